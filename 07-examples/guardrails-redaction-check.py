@@ -0,0 +1,123 @@
+"""
+Differential Redaction Check for OutputGuard
+============================================
+
+OutputGuard finds PII as one list of non-overlapping spans (leftmost
+match wins, then the longest, then PII_PATTERNS order) instead of running
+re.sub once per pattern. That is faster and lets detection and redaction
+share one pass - but it must not leak anything the per-pattern `sub` chain
+used to redact. This fuzzes both over text built from PII fragments and
+checks:
+
+    - coverage: every character the sequential `sub` chain redacted is
+      redacted by the span engine too (it may redact more - an SSN
+      inside an email local part goes with the email)
+    - streaming: StreamingOutputGuard, fed random chunk sizes, releases
+      exactly the non-streamed redaction whenever every match fits in its
+      window
+    - known regressions: fixed inputs with their exact expected output
+
+Each runs with and without EvaluationLimits (windowed matching).
+Exits non-zero on any mismatch - run it in CI next to the pattern lists.
+
+Usage:
+    python guardrails-redaction-check.py [--cases 20000] [--seed 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+
+from guardrails import EvaluationLimits, OutputGuard, StreamingOutputGuard
+
+FRAGMENTS = [
+    "123-45-6789", "123456789", "4111 1111 1111 1111", "4111-1111-1111-1111",
+    "4111111111111111", "a.b@ex.com", "1", "12", "1234", " ", "-", ".", "@", " x ", "hello world ",
+]
+
+# Overlapping candidates that once hid a later match
+REGRESSIONS = {
+    "123-45-6789 4111 1111 1111 1111": "[REDACTED:SSN] [REDACTED:CREDIT_CARD]",
+    "x 123-45-6789 4111 1111 1111 1111 4111 1111 1111 1111": (
+        "x [REDACTED:SSN] [REDACTED:CREDIT_CARD] [REDACTED:CREDIT_CARD]"
+    ),
+    "4111-1111-1111-11111234": "4111-[REDACTED:CREDIT_CARD]",
+}
+
+
+def sequential_redacted(text: str) -> set[int]:
+    """Positions of `text` the old one-re.sub-per-pattern chain replaced."""
+    current, owners = text, list(range(len(text)))  # owners[j]: source index, -1 if inserted
+    redacted: set[int] = set()
+    for pattern, category in OutputGuard.PII_PATTERNS:
+        replacement = f"[REDACTED:{category.upper()}]"
+        parts, part_owners, last = [], [], 0
+        for match in re.finditer(pattern, current):
+            redacted.update(owner for owner in owners[match.start():match.end()] if owner >= 0)
+            parts.append(current[last:match.start()] + replacement)
+            part_owners += owners[last:match.start()] + [-1] * len(replacement)
+            last = match.end()
+        parts.append(current[last:])
+        current, owners = "".join(parts), part_owners + owners[last:]
+    return redacted
+
+
+def stream(guard: OutputGuard, text: str, rng: random.Random) -> str:
+    streaming = StreamingOutputGuard(guard)
+    released, pos = [], 0
+    while pos < len(text):
+        size = rng.randint(1, 20)
+        released.append(streaming.feed(text[pos:pos + size]).text)
+        pos += size
+    released.append(streaming.finish().text)
+    return "".join(released)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = 0
+    for label, guard in (("re", OutputGuard()), ("bounded", OutputGuard(limits=EvaluationLimits()))):
+        for text, expected in REGRESSIONS.items():
+            got = guard.redact_spans(text, guard.find_pii_spans(text))
+            if got != expected:
+                failures += 1
+                print(f"[{label}] regression: {text!r} -> {got!r}, expected {expected!r}")
+
+        rng = random.Random(args.seed)
+        leaked = diverged = streamed = 0
+        for _ in range(args.cases):
+            text = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 12)))
+            spans = guard.find_pii_spans(text)
+
+            covered = {i for span in spans for i in range(span.start, span.end)}
+            if not sequential_redacted(text) <= covered:
+                leaked += 1
+                if leaked <= 3:
+                    print(f"[{label}] leaks what re.sub redacted: {text!r}")
+
+            if all(span.end - span.start <= 64 for span in spans):  # The default window
+                streamed += 1
+                expected = guard.redact_spans(text, spans)
+                if stream(guard, text, rng) != expected:
+                    diverged += 1
+                    if diverged <= 3:
+                        print(f"[{label}] streamed output differs: {text!r}")
+
+        print(
+            f"{label:<8} {args.cases} cases: {leaked} leak(s) vs sequential re.sub, "
+            f"{diverged}/{streamed} streamed mismatches"
+        )
+        failures += leaked + diverged
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Pathological-Input Benchmark for Guardrails
+===========================================
+
+Attackers choose what the guards scan. This feeds RuleEngine and
+OutputGuard inputs built to make backtracking regexes go quadratic, and
+shows that with EvaluationLimits the worst case stays bounded:
+
+    - unbounded:      plain `re` over the whole input (the old behavior)
+    - bounded (re):   windowed `re` + CPU budget
+    - bounded (re2):  linear-time engine, if google-re2 is installed
+
+Exits non-zero if any bounded check takes longer than its CPU budget plus
+SLACK_MS - run it in CI next to the pattern lists.
+
+Usage:
+    python guardrails-redos-benchmark.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from guardrails import (
+    EvaluationLimits,
+    GuardAction,
+    OutputGuard,
+    RequestContext,
+    RuleEngine,
+    re2,
+)
+
+# Thread CPU is checked between windows, so the budget can be overshot by
+# one window's work (and wall time includes scheduling noise)
+SLACK_MS = 50.0
+
+LIMITS = EvaluationLimits(max_chars=100_000, max_match_chars=256, cpu_budget_ms=100.0)
+
+
+def pathological_inputs(size: int) -> dict[str, tuple[str, str]]:
+    """name -> (direction, content) of roughly `size` chars."""
+    # Each ends with the rule's required literal so the scanner's gate
+    # can't rule the pattern out - the regex has to run
+    return {
+        # \s+(now\s+)?(a|an|the)?\s* tries every split of the run
+        "role_whitespace_run": ("input", "you are" + " " * size + "x evil"),
+        # Many starts, each with a long run
+        "role_repeated": ("input", ("you are" + " " * 200 + "x ") * (size // 210) + "evil"),
+        # Email local part: every "." is a fresh \b start scanning to the "@"
+        "email_dots": ("output", "a." * (size // 2) + "@"),
+        # \s+ after a literal prefix, repeated
+        "forbidden_prefix_runs": ("output", ("my" + " " * 100) * (size // 102) + "system"),
+        "digit_runs": ("output", "1 " * (size // 2)),
+    }
+
+
+def time_check(guard, content: str, context: RequestContext) -> tuple[float, GuardAction]:
+    start = time.perf_counter()
+    result = asyncio.run(guard.check(content, context))
+    return (time.perf_counter() - start) * 1000, result.action
+
+
+def main() -> int:
+    context = RequestContext(
+        tenant_id="bench", user_id="bench", session_id="bench", trace_id="bench", request_type="chat"
+    )
+
+    engines = {"unbounded": None, "bounded (re)": EvaluationLimits(
+        max_chars=LIMITS.max_chars,
+        max_match_chars=LIMITS.max_match_chars,
+        cpu_budget_ms=LIMITS.cpu_budget_ms,
+        use_linear_engine=False,
+    )}
+    if re2 is not None:
+        engines["bounded (re2)"] = LIMITS
+
+    print(f"{'input':<24}{'chars':>9}  {'engine':<15}{'ms':>10}  action")
+    print("-" * 72)
+
+    worst_bounded = 0.0
+    for size in (2_000, 4_000, 90_000):
+        for name, (direction, content) in pathological_inputs(size).items():
+            for engine, limits in engines.items():
+                if limits is None and size > 4_000:
+                    continue  # Quadratic - minutes at this size
+                guard = RuleEngine(limits) if direction == "input" else OutputGuard(limits=limits)
+                elapsed, action = time_check(guard, content, context)
+                if limits is not None:
+                    worst_bounded = max(worst_bounded, elapsed)
+                print(f"{name:<24}{len(content):>9}  {engine:<15}{elapsed:>10.1f}  {action.value}")
+
+    # Oversized input is rejected before any regex runs
+    oversized = "a" * 10_000_000
+    elapsed, action = time_check(RuleEngine(LIMITS), oversized, context)
+    worst_bounded = max(worst_bounded, elapsed)
+    print(f"{'oversized':<24}{len(oversized):>9}  {'bounded':<15}{elapsed:>10.1f}  {action.value}")
+
+    # Under max_chars raw, but NFKC expands each U+FDFA to 18 chars - the
+    # size limit has to apply to what the rules would actually scan
+    nfkc_guards = {"nfkc_expansion": RuleEngine(LIMITS), "nfkc_expansion_out": OutputGuard(limits=LIMITS)}
+    for name, guard in nfkc_guards.items():
+        expanding = "\ufdfa" * (LIMITS.max_chars - 1_000)
+        elapsed, action = time_check(guard, expanding, context)
+        worst_bounded = max(worst_bounded, elapsed)
+        print(f"{name:<24}{len(expanding):>9}  {'bounded':<15}{elapsed:>10.1f}  {action.value}")
+
+    ceiling = LIMITS.cpu_budget_ms + SLACK_MS
+    print(f"\nWorst bounded check: {worst_bounded:.1f}ms (ceiling {ceiling:.0f}ms)")
+    return 0 if worst_bounded <= ceiling else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -29,13 +29,42 @@ Usage:
 from __future__ import annotations
 
 import asyncio
+import functools
 import hashlib
+import hmac
+import json
+import math
+import os
+import random
 import re
+import sqlite3
+import sys
+import threading
 import time
+import unicodedata
+import zlib
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
 from enum import Enum
-from typing import Any, Callable, Optional
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+try:
+    import numpy as np
+except ImportError:  # Only the local classifier needs NumPy
+    np = None
+
+try:
+    import re._parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+try:
+    import re2  # google-re2: linear-time matching
+except ImportError:  # Bounded evaluation falls back to windowed `re`
+    re2 = None
 
 # =============================================================================
 # Core Types
@@ -48,6 +77,25 @@ class GuardAction(Enum):
     REDACT = "redact"
     REVIEW = "review"  # Queue for human review
     ESCALATE = "escalate"  # Immediate alert
+    LIMIT_EXCEEDED = "limit_exceeded"  # Input too big / too costly to check - fail closed
+
+    @property
+    def is_blocking(self) -> bool:
+        return self in (GuardAction.BLOCK, GuardAction.LIMIT_EXCEEDED)
+
+    @property
+    def severity(self) -> int:
+        return _ACTION_SEVERITY[self]
+
+
+_ACTION_SEVERITY = {
+    GuardAction.ALLOW: 0,
+    GuardAction.REVIEW: 1,
+    GuardAction.REDACT: 2,
+    GuardAction.ESCALATE: 3,
+    GuardAction.BLOCK: 4,
+    GuardAction.LIMIT_EXCEEDED: 5,  # Fail closed - outranks everything
+}
 
 
 @dataclass
@@ -58,10 +106,11 @@ class GuardResult:
     latency_ms: float
     guard_name: str
     metadata: dict = field(default_factory=dict)
+    rule_pack_version: Optional[str] = None  # Rules that produced this verdict (rule-based guards)
 
     @property
     def blocked(self) -> bool:
-        return self.action == GuardAction.BLOCK
+        return self.action.is_blocking
 
     @property
     def requires_attention(self) -> bool:
@@ -75,10 +124,13 @@ class PipelineResult:
     total_latency_ms: float
     rejection_response: Optional[str] = None
     safe_output: Optional[str] = None
+    cached: bool = False  # Served from the verdict cache
+    coalesced: bool = False  # Shared an identical in-flight check's evaluation
+    latency_saved_ms: float = 0.0  # Guard time a cache hit avoided
 
     @property
     def blocked(self) -> bool:
-        return self.action == GuardAction.BLOCK
+        return self.action.is_blocking
 
     @property
     def redacted(self) -> bool:
@@ -96,6 +148,8 @@ class RequestContext:
     request_type: str  # "chat", "completion", "agent_action", etc.
     risk_tier: str = "standard"  # "low", "standard", "high", "critical"
     previous_violations: int = 0
+    guard_execution: Optional[str] = None  # "sequential" / "parallel"; None = config default
+    latency_budget_ms: Optional[float] = None  # Whole check_input/check_output; None = config default
     metadata: dict = field(default_factory=dict)
 
 
@@ -115,6 +169,938 @@ class Guard(ABC):
     async def check(self, content: str, context: RequestContext) -> GuardResult:
         pass
 
+    def applies(self, context: RequestContext, prior: list[GuardResult]) -> bool:
+        """
+        Whether to run for this request. `prior` holds earlier guards'
+        results in sequential mode and is empty in parallel mode. A guard
+        that doesn't apply is left out of the results.
+        """
+        return True
+
+    @property
+    def version(self) -> str:
+        """
+        Fingerprint of everything that can change this guard's verdict for
+        the same input (rules, thresholds). Part of the verdict cache key, so
+        changing a rule or threshold invalidates cached verdicts.
+        """
+        return self.name
+
+    def _limit_result(self, error: EvaluationLimitExceeded, start: float) -> GuardResult:
+        # Not "no match" - we don't know. Fail closed: an attacker who can
+        # make the check expensive must not get a free pass.
+        return GuardResult(
+            action=GuardAction.LIMIT_EXCEEDED,
+            reason=f"Evaluation limit exceeded: {error.limit}",
+            confidence=1.0,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            guard_name=self.name,
+            metadata={"limit_exceeded": error.limit, "detail": str(error)},
+        )
+
+
+def _fingerprint(*parts: Any) -> str:
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+
+
+# =============================================================================
+# Content Preprocessing
+# =============================================================================
+
+
+def _confusables_table() -> dict[str, str]:
+    table: dict[str, str] = {}
+    # Invisible: zero-width, soft hyphen, joiners, bidi controls
+    for start, end in (
+        (0x00AD, 0x00AD), (0x034F, 0x034F), (0x061C, 0x061C), (0x180E, 0x180E),
+        (0x200B, 0x200F), (0x202A, 0x202E), (0x2060, 0x2064), (0x2066, 0x2069), (0xFEFF, 0xFEFF),
+    ):
+        table.update(dict.fromkeys(map(chr, range(start, end + 1)), ""))
+    # Unicode tag characters spell hidden ASCII ("ASCII smuggling") - the
+    # model can read it, so the guards should too
+    table.update({chr(cp): chr(cp - 0xE0000) for cp in range(0xE0020, 0xE007F)})
+    table.update(dict.fromkeys(map(chr, (0xE0001, 0xE007F)), ""))
+    # Cyrillic and Greek letters drawn like Latin ones. NFKC leaves these
+    # alone (they're distinct letters); only the common lookalikes
+    lookalikes = {
+        "a": "аα", "c": "сϲ", "d": "ԁ", "e": "еε", "h": "һ", "i": "іιӏ", "j": "ј",
+        "k": "κ", "o": "оο", "p": "рρ", "q": "ԛ", "s": "ѕ", "u": "υ", "v": "ν",
+        "w": "ԝ", "x": "хχ", "y": "у",
+        "A": "АΑ", "B": "ВΒ", "C": "СϹ", "E": "ЕΕ", "H": "НΗ", "I": "ІΙ", "J": "Ј",
+        "K": "КΚ", "M": "МΜ", "N": "Ν", "O": "ОΟ", "P": "РΡ", "S": "Ѕ", "T": "ТΤ",
+        "X": "ХΧ", "Y": "ΥҮ", "Z": "Ζ",
+    }
+    table.update({ch: latin for latin, chars in lookalikes.items() for ch in chars})
+    return table
+
+
+class ContentView(str):
+    """
+    One piece of content plus every derived form the guards need, each
+    computed at most once per request.
+
+    It is a str (the raw content), so it passes through Guard.check()
+    unchanged and guards that don't know about it keep working. The
+    pipeline wraps content once; guards call ContentView.of(content),
+    which is free when the pipeline already did.
+
+        normalized  NFKC (full-width and math letters -> ASCII), invisible
+                    characters stripped, Latin lookalikes folded - what the
+                    rules and the classifier should judge
+        folded      normalized, case-folded (MultiPatternScanner.fold)
+        digest      of the raw content - the verdict cache key
+        feature()   anything else a guard derives, memoized per view
+
+    Evasions like "ign<U+200B>ore", full-width "ｉｇｎｏｒｅ" or "іgnore" with
+    a Cyrillic і all normalize to "ignore". Offsets into `normalized` don't map back to the
+    raw content - anything that edits the content (PII redaction) works on
+    the raw form.
+
+    ASCII content (most traffic) has nothing to normalize: `normalized` is
+    the content itself, at the cost of one isascii() check.
+    """
+
+    NORMALIZE_TABLE = _confusables_table()
+
+    @classmethod
+    def of(cls, content: str) -> ContentView:
+        return content if isinstance(content, ContentView) else cls(content)
+
+    @functools.cached_property
+    def normalized(self) -> str:
+        if self.isascii():
+            return str(self)
+        return self.fold_confusables(unicodedata.normalize("NFKC", self))
+
+    @classmethod
+    def fold_confusables(cls, text: str) -> str:
+        """Strip invisibles and fold lookalikes in already-NFKC text."""
+        # Not str.translate: with a dict table it looks up every character
+        # (~10ms per 100KB). A membership test is a C-speed scan - and
+        # instant when the string's storage width can't hold the character
+        for ch, replacement in cls.NORMALIZE_TABLE.items():
+            if ch in text:
+                text = text.replace(ch, replacement)
+        return text
+
+    @functools.cached_property
+    def folded(self) -> str:
+        return MultiPatternScanner.fold(self.normalized)
+
+    @functools.cached_property
+    def normalization_changed(self) -> bool:
+        """False when normalized == raw - offsets into either are interchangeable."""
+        return self.normalized != self
+
+    @functools.cached_property
+    def digest(self) -> bytes:
+        return hashlib.blake2b(self.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    @functools.cached_property
+    def _features(self) -> dict[str, Any]:
+        return {}
+
+    def feature(self, name: str, compute: Callable[[ContentView], Any]) -> Any:
+        """compute(self), computed on first use and shared by later callers."""
+        if name not in self._features:
+            self._features[name] = compute(self)
+        return self._features[name]
+
+
+# =============================================================================
+# Bounded Evaluation
+# =============================================================================
+
+
+class EvaluationLimitExceeded(Exception):
+    """A check hit its input-size or CPU limit before reaching a verdict."""
+
+    def __init__(self, limit: str, detail: str):
+        super().__init__(detail)
+        self.limit = limit  # "input_size" or "cpu_time"
+
+
+@dataclass
+class EvaluationLimits:
+    """
+    Caps the cost of one guard check on attacker-controlled content.
+
+    Python's `re` backtracks: `you are` followed by 4,000 spaces costs the
+    role-manipulation rule ~1 second, because `\\s+(now\\s+)?(a|an|the)?\\s*`
+    tries every way of splitting the run. Three defenses, cheapest first:
+
+        1. Size: content over max_chars is not scanned at all.
+        2. Match window: rules run over short overlapping windows (anchored
+           rules over max_match_chars from each anchor), so backtracking
+           per window is bounded. Matches longer than max_match_chars may
+           not be seen - no real rule needs 256 chars.
+        3. CPU budget: thread CPU time is checked between windows. `re`
+           can't be interrupted mid-match, so the overshoot is at most one
+           window's worth - which (2) keeps small.
+
+    When google-re2 is installed, rules it supports run on its linear-time
+    engine instead of windows (no lookbehind or backreferences; \\b and \\s
+    are ASCII-only there).
+
+    Hitting a limit yields GuardAction.LIMIT_EXCEEDED, which blocks.
+    """
+
+    max_chars: int = 100_000
+    max_match_chars: int = 256
+    cpu_budget_ms: float = 50.0
+    use_linear_engine: bool = True
+
+    def begin(self, content: str) -> CpuBudget:
+        """Admit content for scanning and start its CPU clock."""
+        if len(content) > self.max_chars:
+            raise EvaluationLimitExceeded(
+                "input_size", f"{len(content)} chars exceeds limit of {self.max_chars}"
+            )
+        return CpuBudget(self.cpu_budget_ms)
+
+    NORMALIZE_CHUNK = 4096  # Raw chars per NFKC call: <= ~74K chars out, a few ms
+
+    def normalize(self, view: ContentView, budget: CpuBudget) -> str:
+        """
+        view.normalized, computed under the size and CPU limits.
+
+        NFKC can expand text up to 18x ("\ufdfa" is 18 chars), so the raw
+        size check in begin() doesn't bound what rules scan - and one NFKC
+        call over 100K chars can take longer than the whole budget. So
+        normalize in chunks, checking the running size and the clock after
+        each. The result is cached on the view as usual.
+        """
+        if view.isascii() or "normalized" in view.__dict__:
+            normalized = view.normalized
+        else:
+            parts, size, start = [], 0, 0
+            while start < len(view):
+                end = self._chunk_end(view, start + self.NORMALIZE_CHUNK)
+                part = unicodedata.normalize("NFKC", view[start:end])
+                size += len(part)
+                if size > self.max_chars:
+                    raise EvaluationLimitExceeded(
+                        "input_size", f"over {self.max_chars} chars after normalization"
+                    )
+                budget.check()
+                parts.append(part)
+                start = end
+            normalized = view.__dict__["normalized"] = ContentView.fold_confusables("".join(parts))
+        budget.check()
+        return normalized
+
+    @staticmethod
+    def _chunk_end(text: str, end: int) -> int:
+        """
+        A cut at or after `end` that NFKC can't see across.
+
+        Nothing composes onto an ASCII character, so cutting before one is
+        exact. Text with no ASCII nearby falls back to the next character
+        of combining class 0 (misses only Hangul jamo and a few Indic vowel
+        signs that compose as starters).
+        """
+        if end >= len(text):
+            return len(text)
+        for i in range(end, min(end + 64, len(text))):
+            if text[i].isascii():
+                return i
+        while end < len(text) and unicodedata.combining(text[end]):
+            end += 1
+        return end
+
+
+class CpuBudget:
+    """Thread CPU time allowed for one check (wall time would count other tasks)."""
+
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self.deadline = time.thread_time() + budget_ms / 1000
+
+    def check(self) -> None:
+        if time.thread_time() > self.deadline:
+            raise EvaluationLimitExceeded(
+                "cpu_time", f"check exceeded CPU budget of {self.budget_ms:.0f}ms"
+            )
+
+
+class BoundedPattern:
+    """A compiled rule evaluated under EvaluationLimits."""
+
+    def __init__(self, pattern: re.Pattern, limits: EvaluationLimits):
+        self.pattern = pattern
+        self.limits = limits
+        self.linear = self._compile_linear(pattern) if limits.use_linear_engine else None
+
+    @staticmethod
+    def _compile_linear(pattern: re.Pattern):
+        if re2 is None:
+            return None
+        inline_flags = "(?i)" if pattern.flags & re.IGNORECASE else ""
+        try:
+            return re2.compile(inline_flags + pattern.pattern)
+        except Exception:  # Lookbehind, backreferences, ... - stay on `re`
+            return None
+
+    # Match starts per window, in units of max_match_chars. Each window is
+    # searched with max_match_chars of lookahead, so that much is scanned
+    # twice - wider windows rescan less but overshoot the budget by more.
+    WINDOW_STARTS = 4
+
+    def _window_step(self) -> int:
+        return self.WINDOW_STARTS * self.limits.max_match_chars
+
+    def _windows(self, start: int, end: int) -> Iterator[tuple[int, int]]:
+        """(window_start, search_endpos) pairs covering match starts in [start, end)."""
+        step = self._window_step()
+        for window_start in range(start, end, step):
+            yield window_start, min(end, window_start + step + self.limits.max_match_chars)
+
+    def match(self, content: str, pos: int, budget: CpuBudget) -> bool:
+        """Anchored match at pos."""
+        budget.check()
+        if self.linear is not None:
+            return self.linear.match(content, pos) is not None
+        endpos = min(len(content), pos + self.limits.max_match_chars)
+        return self.pattern.match(content, pos, endpos) is not None
+
+    def search(self, content: str, budget: CpuBudget) -> bool:
+        if self.linear is not None:
+            budget.check()
+            return self.linear.search(content) is not None
+        for window_start, endpos in self._windows(0, len(content)):
+            budget.check()
+            if self.pattern.search(content, window_start, endpos):
+                return True
+        return False
+
+    def find(self, content: str, pos: int, budget: CpuBudget) -> Optional[tuple[int, int]]:
+        """(start, end) of the leftmost match starting at or after pos."""
+        if self.linear is not None:
+            budget.check()
+            match = self.linear.search(content, pos)
+            return match.span() if match else None
+
+        step = self._window_step()
+        for window_start, endpos in self._windows(pos, len(content)):
+            budget.check()
+            match = self.pattern.search(content, window_start, endpos)
+            if match and match.start() < window_start + step:
+                return match.span()
+        return None
+
+
+# =============================================================================
+# Multi-Pattern Scanning
+# =============================================================================
+
+
+class MultiPatternScanner:
+    """
+    Answers "which of these regexes matches?" without running every regex
+    over the whole content.
+
+    Build time (once per rule set), from each parsed regex:
+        - Required literals: one of them must appear in any match
+          (`ignore\s+...\s+instructions?` -> {"instruction"}). Picks the
+          set whose shortest member is longest - rarer literals gate better.
+        - Literal prefixes: every match starts with one of them
+          (`(show|tell)\s+me` -> {"show", "tell"}).
+
+    Scan time:
+        1. Case-fold the content once.
+        2. Gate: a rule whose required literals are all absent cannot match,
+           so it never runs. str.find is a C-speed substring search, and
+           each distinct literal is searched once per scan - on benign
+           traffic almost every rule is ruled out here.
+        3. Verify survivors with an anchored `match` at each prefix
+           occurrence, instead of a `search` over the whole content.
+
+    Why not one big alternation: CPython's regex engine has no multi-literal
+    automaton, so `(lit1|lit2|...)` with IGNORECASE tries every alternative
+    at every position - slower than the per-rule loop it replaces.
+
+    Results are identical to searching each pattern in list order: gating
+    only drops rules that cannot match, and a rule matches somewhere iff it
+    matches at one of its prefix positions.
+
+    With `limits`, verification goes through BoundedPattern (see Bounded
+    Evaluation) and takes a CpuBudget; gating is linear and stays as is.
+    """
+
+    MAX_PREFIXES_PER_PATTERN = 64
+
+    # English letter frequency, most to least common. Anything not listed
+    # (digits, punctuation) counts as rarer than every letter.
+    LETTER_FREQUENCY = "etaoinshrdlcumwfgypbvkjxqz"
+
+    def __init__(
+        self,
+        patterns: list[re.Pattern],
+        limits: Optional[EvaluationLimits] = None,
+        analysis: Optional[dict] = None,  # From analysis() - skips re-parsing (rule pack cache)
+    ):
+        self.patterns = patterns
+        self.bounded = [BoundedPattern(p, limits) for p in patterns] if limits else None
+        self.gates: list[Optional[tuple[str, ...]]] = []
+        self.prefixes: list[Optional[tuple[str, ...]]] = []
+
+        if analysis is not None:
+            self.gates = [tuple(g) if g is not None else None for g in analysis["gates"]]
+            self.prefixes = [tuple(p) if p is not None else None for p in analysis["prefixes"]]
+        else:
+            for pattern in patterns:
+                parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+                gate = self._fold_literals(self._required_literals(parsed))
+                if gate is not None:
+                    # "inst]" present is implied by "/inst]" present - search only the former
+                    gate = tuple(lit for lit in gate if not any(o != lit and o in lit for o in gate))
+                self.gates.append(gate)
+                prefixes, _ = self._sequence_prefixes(parsed)
+                self.prefixes.append(self._fold_literals(prefixes))
+
+        self.rare_chars: dict[str, str] = {
+            literal: self._rarest_char(literal)
+            for literals in self.gates + self.prefixes
+            if literals is not None
+            for literal in literals
+        }
+
+    def analysis(self) -> dict:
+        """The parsed-pattern results, JSON-serializable, for MultiPatternScanner(analysis=...)."""
+        return {"gates": self.gates, "prefixes": self.prefixes}
+
+    @staticmethod
+    def _fold_literals(literals: Optional[set[str]]) -> Optional[tuple[str, ...]]:
+        # Non-ASCII literals have case-folding corner cases - don't gate on them
+        if not literals or any(not lit or not lit.isascii() for lit in literals):
+            return None
+        return tuple(sorted({lit.lower() for lit in literals}))
+
+    @classmethod
+    def _rarest_char(cls, literal: str) -> str:
+        def rarity(ch: str) -> int:
+            rank = cls.LETTER_FREQUENCY.find(ch)
+            return len(cls.LETTER_FREQUENCY) if rank == -1 else rank
+
+        return max(literal, key=rarity)
+
+    @staticmethod
+    def fold(content: str) -> str:
+        """
+        Fold case so a plain substring test finds every IGNORECASE match.
+
+        casefold() covers the Unicode equivalences re.IGNORECASE uses
+        (long s, Kelvin sign, ...). Dotless i is the one exception.
+        """
+        if content.isascii():
+            return content.lower()
+        return content.casefold().replace("\u0131", "i")
+
+    @classmethod
+    def _required_literals(cls, items) -> Optional[set[str]]:
+        best: Optional[set[str]] = None
+
+        def consider(candidates: Optional[set[str]]) -> None:
+            nonlocal best
+            if not candidates or not all(candidates):
+                return
+            # Longest shortest-member wins; on a tie, fewer literals to search
+            if best is None or (min(map(len, candidates)), -len(candidates)) > (
+                min(map(len, best)),
+                -len(best),
+            ):
+                best = candidates
+
+        run = ""
+        for op, av in items:
+            if op == sre_parse.LITERAL:
+                run += chr(av)
+                continue
+
+            consider({run} if run else None)
+            run = ""
+
+            if op == sre_parse.SUBPATTERN:
+                consider(cls._required_literals(av[-1]))
+            elif op == sre_parse.BRANCH:
+                branches = [cls._required_literals(alt) for alt in av[1]]
+                if all(branches):
+                    consider(set().union(*branches))
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+                consider(cls._required_literals(av[2]))
+            # Optional items, classes, anchors: require nothing
+
+        consider({run} if run else None)
+        return best
+
+    @classmethod
+    def _sequence_prefixes(cls, items) -> tuple[set[str], bool]:
+        """Return (prefixes, complete) - complete means the whole sequence was literal."""
+        prefixes = {""}
+        for op, av in items:
+            if op == sre_parse.LITERAL:
+                prefixes = {p + chr(av) for p in prefixes}
+                continue
+
+            if op == sre_parse.SUBPATTERN:
+                alternatives = [av[-1]]
+            elif op == sre_parse.BRANCH:
+                alternatives = av[1]
+            else:
+                return prefixes, False  # Repeats, classes, anchors: prefix ends here
+
+            branches = [cls._sequence_prefixes(alt) for alt in alternatives]
+            if any("" in branch_prefixes for branch_prefixes, _ in branches):
+                return prefixes, False
+
+            tails = set().union(*(branch_prefixes for branch_prefixes, _ in branches))
+            if len(prefixes) * len(tails) > cls.MAX_PREFIXES_PER_PATTERN:
+                return prefixes, False
+
+            prefixes = {p + t for p in prefixes for t in tails}
+            if not all(complete for _, complete in branches):
+                return prefixes, False
+
+        return prefixes, True
+
+    def _first(self, literal: str, folded: str, found: dict[str, int]) -> int:
+        if literal not in found:
+            # Single-char `in` is a memchr - far cheaper than a substring
+            # search, and rules out e.g. "\\x" in text with no backslash
+            rare = self.rare_chars[literal]
+            if rare not in found:
+                found[rare] = folded.find(rare)
+            found[literal] = folded.find(literal) if found[rare] != -1 else -1
+        return found[literal]
+
+    def passes_gate(self, i: int, folded: str, found: dict[str, int]) -> bool:
+        """False only if pattern i cannot match: none of its required literals occur."""
+        gate = self.gates[i]
+        return gate is None or any(self._first(lit, folded, found) != -1 for lit in gate)
+
+    def matches(
+        self,
+        i: int,
+        content: str,
+        folded: str,
+        found: Optional[dict[str, int]] = None,
+        budget: Optional[CpuBudget] = None,
+    ) -> bool:
+        """
+        Exactly `self.patterns[i].search(content) is not None`, usually cheaper.
+
+        `found` memoizes each literal's first position in `folded`, so a
+        literal shared by several rules is only searched for once per scan.
+        """
+        if found is None:
+            found = {}
+        if not self.passes_gate(i, folded, found):
+            return False
+
+        prefixes = self.prefixes[i]
+        if self.bounded is not None and budget is not None:
+            return self._matches_bounded(self.bounded[i], prefixes, content, folded, found, budget)
+
+        pattern = self.patterns[i]
+        if prefixes is None or len(folded) != len(content):
+            # No prefix to anchor on, or folding shifted offsets
+            return pattern.search(content) is not None
+
+        for prefix in prefixes:
+            pos = self._first(prefix, folded, found)
+            while pos != -1:
+                if pattern.match(content, pos):
+                    return True
+                pos = folded.find(prefix, pos + 1)
+        return False
+
+    def _matches_bounded(
+        self,
+        pattern: BoundedPattern,
+        prefixes: Optional[tuple[str, ...]],
+        content: str,
+        folded: str,
+        found: dict[str, int],
+        budget: CpuBudget,
+    ) -> bool:
+        if prefixes is None or len(folded) != len(content) or pattern.linear is not None:
+            # One linear-time pass beats many anchored attempts
+            return pattern.search(content, budget)
+
+        for prefix in prefixes:
+            pos = self._first(prefix, folded, found)
+            while pos != -1:
+                if pattern.match(content, pos, budget):
+                    return True
+                pos = folded.find(prefix, pos + 1)
+        return False
+
+    def first_match(
+        self,
+        content: str,
+        folded: Optional[str] = None,
+        found: Optional[dict[str, int]] = None,
+        budget: Optional[CpuBudget] = None,
+    ) -> Optional[int]:
+        """Index of the first pattern (in list order) that matches anywhere."""
+        if folded is None:
+            folded = self.fold(content)
+        if found is None:
+            found = {}
+        for i in range(len(self.patterns)):
+            if self.matches(i, content, folded, found, budget):
+                return i
+        return None
+
+
+# =============================================================================
+# Rule Packs
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class RulePack:
+    """
+    A versioned set of rules, loaded from a JSON file so rules change
+    without a redeploy:
+
+        {
+          "name": "acme-guardrails",
+          "version": "2024.06.2",
+          "injection_patterns": [["ignore\\s+previous", "instruction_override", 0.95]],
+          "forbidden_output_patterns": [["my\\s+system\\s+prompt\\s+is", "system_prompt_leak"]],
+          "pii_patterns": [["\\b\\d{3}-\\d{2}-\\d{4}\\b", "ssn"]]
+        }
+
+    RulePack.builtin().to_file(path) writes the built-in rules as a start.
+    """
+
+    name: str
+    version: str
+    injection_patterns: tuple[tuple[str, str, float], ...]
+    forbidden_output_patterns: tuple[tuple[str, str], ...]
+    pii_patterns: tuple[tuple[str, str], ...]
+
+    @classmethod
+    def builtin(cls) -> RulePack:
+        return cls(
+            name="builtin",
+            version="builtin",
+            injection_patterns=tuple(RuleEngine.INJECTION_PATTERNS),
+            forbidden_output_patterns=tuple(OutputGuard.FORBIDDEN_OUTPUT_PATTERNS),
+            pii_patterns=tuple(OutputGuard.PII_PATTERNS),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> RulePack:
+        return cls(
+            name=data["name"],
+            version=str(data["version"]),
+            injection_patterns=tuple(
+                (str(p), str(c), float(conf)) for p, c, conf in data.get("injection_patterns", [])
+            ),
+            forbidden_output_patterns=tuple(
+                (str(p), str(c)) for p, c in data.get("forbidden_output_patterns", [])
+            ),
+            pii_patterns=tuple((str(p), str(c)) for p, c in data.get("pii_patterns", [])),
+        )
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> RulePack:
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "injection_patterns": [list(rule) for rule in self.injection_patterns],
+            "forbidden_output_patterns": [list(rule) for rule in self.forbidden_output_patterns],
+            "pii_patterns": [list(rule) for rule in self.pii_patterns],
+        }
+
+    def to_file(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2))
+
+    @property
+    def digest(self) -> str:
+        """Content hash - two files with the same version label but different rules differ here."""
+        return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()
+
+
+# Scanner analysis depends on how sre_parse breaks patterns down, which
+# can change between Python versions
+_ANALYSIS_CACHE_TAG = f"py{sys.version_info[0]}{sys.version_info[1]}"
+
+
+def _analysis_mac(key: bytes, pack_digest: str, scanners: dict) -> str:
+    payload = json.dumps({"pack": pack_digest, "scanners": scanners}, sort_keys=True)
+    return hmac.new(key, payload.encode(), hashlib.sha256).hexdigest()
+
+
+@dataclass(frozen=True)
+class CompiledRulePack:
+    """A RulePack ready to scan with - swapped into guards as one object."""
+
+    pack: RulePack
+    injection: list[tuple[re.Pattern, str, float]]
+    injection_scanner: MultiPatternScanner
+    forbidden: list[tuple[re.Pattern, str]]
+    forbidden_scanner: MultiPatternScanner
+    pii: list[tuple[re.Pattern, str]]
+    pii_scanner: MultiPatternScanner
+    fingerprint: str  # Pack digest + limits - part of the guard's cache version
+
+
+def compile_rule_pack(
+    pack: RulePack,
+    limits: Optional[EvaluationLimits] = None,
+    cache_dir: Optional[str | Path] = None,
+    cache_key: Optional[bytes] = None,
+) -> CompiledRulePack:
+    """
+    Compile every rule in the pack (raises re.error on a bad rule).
+
+    Only the scanner analysis (gates and prefixes) is cached: with
+    cache_dir it is read from / written to `{name}-{digest}-{python
+    tag}.json`. Patterns always go through re.compile. For the built-in
+    pack (21 rules) that measured 6.9ms cold vs 4.3ms with the analysis
+    cached - re.compile is most of the rest, so build the pack once per
+    process and share it between guards (GuardrailsPipeline does).
+
+    A gate decides whether a rule runs at all - a tampered cache file
+    could switch rules off. So the file carries an HMAC over the pack
+    digest and the analysis under cache_key (shared by the workers, not
+    stored with the cache); a file that doesn't verify is rebuilt.
+    """
+    if cache_dir is not None and not cache_key:
+        raise ValueError("A rule pack cache_dir needs a cache_key to sign it with")
+
+    sections = {
+        "injection": [(p, re.IGNORECASE) for p, _, _ in pack.injection_patterns],
+        "forbidden": [(p, re.IGNORECASE) for p, _ in pack.forbidden_output_patterns],
+        "pii": [(p, 0) for p, _ in pack.pii_patterns],
+    }
+    compiled = {section: [re.compile(p, flags) for p, flags in rules] for section, rules in sections.items()}
+
+    cache_file = None
+    analysis = None
+    if cache_dir is not None:
+        cache_file = Path(cache_dir) / f"{pack.name}-{pack.digest[:16]}-{_ANALYSIS_CACHE_TAG}.json"
+        try:
+            artifact = json.loads(cache_file.read_text())
+            if hmac.compare_digest(
+                str(artifact["mac"]), _analysis_mac(cache_key, pack.digest, artifact["scanners"])
+            ):
+                analysis = artifact["scanners"]
+        except (OSError, ValueError, KeyError, TypeError):
+            analysis = None  # Missing or corrupt - rebuild
+
+    if analysis is None:
+        analysis = {
+            section: MultiPatternScanner(patterns).analysis() for section, patterns in compiled.items()
+        }
+        if cache_file is not None:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(
+                json.dumps({"scanners": analysis, "mac": _analysis_mac(cache_key, pack.digest, analysis)})
+            )
+            os.replace(tmp, cache_file)  # Concurrent workers never see a partial file
+
+    scanners = {
+        section: MultiPatternScanner(compiled[section], limits, analysis=analysis[section])
+        for section in sections
+    }
+    return CompiledRulePack(
+        pack=pack,
+        injection=[(p, c, conf) for p, (_, c, conf) in zip(compiled["injection"], pack.injection_patterns)],
+        injection_scanner=scanners["injection"],
+        forbidden=[(p, c) for p, (_, c) in zip(compiled["forbidden"], pack.forbidden_output_patterns)],
+        forbidden_scanner=scanners["forbidden"],
+        pii=[(p, c) for p, (_, c) in zip(compiled["pii"], pack.pii_patterns)],
+        pii_scanner=scanners["pii"],
+        fingerprint=_fingerprint(pack.digest, limits),
+    )
+
+
+class RulePackReloader:
+    """
+    Watches a rule pack file and hot-swaps new versions into live guards.
+
+    A background thread polls the file's mtime. On change it loads and
+    compiles the pack (off the request path) - once with `compile`, else
+    once per guard - then swaps each guard's rules with a single attribute
+    assignment. Requests in
+    flight finish on the rules they started with; the next one sees the
+    new pack. No locks on the request path, no stall.
+
+    A pack that fails to load or compile is never swapped in - the guards
+    keep serving the last good version and `last_error` says why.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        guards: list[Guard],
+        poll_seconds: float = 5.0,
+        active: Optional[RulePack] = None,  # Pack the guards were built with
+        compile: Optional[Callable[[RulePack], CompiledRulePack]] = None,  # One build for all guards
+    ):
+        self.path = Path(path)
+        self.guards = [g for g in guards if hasattr(g, "swap_rules")]
+        self.compile = compile
+        self.poll_seconds = poll_seconds
+        self.active_digest: Optional[str] = active.digest if active else None
+        self.active_version: Optional[str] = active.version if active else None
+        self.last_error: Optional[Exception] = None
+        self.reloads = 0
+        # With an active pack, only a later change to the file triggers a reload
+        self._mtime_ns: Optional[int] = self.path.stat().st_mtime_ns if active else None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def reload(self) -> bool:
+        """Load, compile and swap now. True if a new pack went live; raises on a bad pack."""
+        self._mtime_ns = self.path.stat().st_mtime_ns
+        pack = RulePack.from_file(self.path)
+        if pack.digest == self.active_digest:
+            return False
+
+        # Compile for every guard first, then swap - input and output
+        # guards flip to the new pack together
+        if self.compile is not None:
+            shared = self.compile(pack)
+            compiled = [(guard, shared) for guard in self.guards]
+        else:
+            compiled = [(guard, guard.compile_rules(pack)) for guard in self.guards]
+        for guard, rules in compiled:
+            guard.swap_rules(rules)
+
+        self.active_digest = pack.digest
+        self.active_version = pack.version
+        self.reloads += 1
+        return True
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="rule-pack-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                if self.path.stat().st_mtime_ns != self._mtime_ns:
+                    self.reload()
+                    self.last_error = None
+            except Exception as e:  # Keep the last good pack
+                self.last_error = e
+
+
+# =============================================================================
+# Layer 0: Rate Limiting (Before Any Guard Runs)
+# =============================================================================
+
+
+class RateLimitGuard(Guard):
+    """
+    Per-(tenant, user) request limit, checked before anything expensive.
+
+    Without it an abusive user gets unlimited classifier calls - the costly
+    part of the pipeline.
+
+    GCRA (generic cell rate algorithm): each key stores one float, its
+    "theoretical arrival time" (TAT). A request is allowed if it isn't more
+    than `burst` requests ahead of the steady rate; allowing it pushes the
+    TAT forward by one interval. Same behavior as a token bucket, O(1)
+    memory per key, no timers.
+
+    State is split across shards, each with its own lock, so concurrent
+    callers (threads, or several loops) rarely contend. A key whose TAT is
+    in the past is indistinguishable from a new key, so it can be dropped:
+    every check sweeps a few of the least recently seen keys from its
+    shard. Memory tracks active users, not all users ever seen;
+    max_keys_per_shard is the hard cap (evicting a live key only forgives
+    its remaining debt).
+    """
+
+    SWEEP_PER_CHECK = 4
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        burst: Optional[int] = None,  # None = one minute's worth
+        shards: int = 64,
+        max_keys_per_shard: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__("rate_limit")
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst if burst is not None else requests_per_minute
+        self.interval = 60.0 / requests_per_minute
+        self.tolerance = self.interval * (self.burst - 1)
+        self.max_keys_per_shard = max_keys_per_shard
+        self.clock = clock
+        self._shards: list[OrderedDict[tuple[str, str], float]] = [OrderedDict() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    @property
+    def version(self) -> str:
+        return _fingerprint(self.name, self.requests_per_minute, self.burst)
+
+    def acquire(self, tenant_id: str, user_id: str) -> float:
+        """0.0 if allowed (and counted), else seconds until the next request would be."""
+        key = (tenant_id, user_id)
+        index = hash(key) % len(self._shards)
+        shard = self._shards[index]
+
+        with self._locks[index]:
+            now = self.clock()
+            tat = max(shard.get(key, now), now)
+            if tat - now > self.tolerance:
+                return tat - now - self.tolerance
+
+            shard[key] = tat + self.interval
+            shard.move_to_end(key)
+            self._sweep(shard, now)
+            return 0.0
+
+    def _sweep(self, shard: OrderedDict[tuple[str, str], float], now: float) -> None:
+        for _ in range(self.SWEEP_PER_CHECK):
+            oldest_key, oldest_tat = next(iter(shard.items()))
+            if oldest_tat > now and len(shard) <= self.max_keys_per_shard:
+                return
+            del shard[oldest_key]
+
+    @property
+    def tracked_keys(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    async def check(self, content: str, context: RequestContext) -> GuardResult:
+        start = time.perf_counter()
+        retry_after = self.acquire(context.tenant_id, context.user_id)
+
+        if retry_after > 0:
+            return GuardResult(
+                action=GuardAction.BLOCK,
+                reason="Rate limit exceeded",
+                confidence=1.0,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                guard_name=self.name,
+                metadata={"retry_after_seconds": round(retry_after, 3), "rate_limited": True},
+            )
+
+        return GuardResult(
+            action=GuardAction.ALLOW,
+            reason="Within rate limit",
+            confidence=1.0,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            guard_name=self.name,
+        )
+
 
 # =============================================================================
 # Layer 1: Rule-Based Guards (Fast, Deterministic)
@@ -125,7 +1111,7 @@ class RuleEngine(Guard):
     """
     Pattern-matching guard using compiled regex rules.
 
-    Performance: <1ms for typical inputs
+    Performance: <1ms for typical inputs (single scan - see MultiPatternScanner)
     False positive rate: ~2% (tune thresholds per deployment)
 
     Why regex first:
@@ -161,37 +1147,101 @@ class RuleEngine(Guard):
         (r"\[INST\]|\[\/INST\]|\[SYS\]", "delimiter_injection", 0.9),
     ]
 
-    def __init__(self):
+    # Suspicion reported per near-miss category on inputs that pass
+    NEAR_MISS_SUSPICION = 0.25
+
+    def __init__(
+        self,
+        limits: Optional[EvaluationLimits] = None,
+        rule_pack: Optional[RulePack] = None,  # None = INJECTION_PATTERNS
+        cache_dir: Optional[str | Path] = None,  # Compiled rule pack cache
+        cache_key: Optional[bytes] = None,  # Signs that cache
+        rules: Optional[CompiledRulePack] = None,  # Already compiled (shared with OutputGuard)
+    ):
         super().__init__("rule_engine")
+        self.limits = limits
+        self.cache_dir = cache_dir
+        self.cache_key = cache_key
         # Pre-compile patterns for performance
-        self.compiled_patterns = [
-            (re.compile(pattern, re.IGNORECASE), category, confidence)
-            for pattern, category, confidence in self.INJECTION_PATTERNS
-        ]
+        self.swap_rules(rules or self.compile_rules(rule_pack or RulePack.builtin()))
+
+    def compile_rules(self, pack: RulePack) -> CompiledRulePack:
+        return compile_rule_pack(pack, self.limits, self.cache_dir, self.cache_key)
+
+    def swap_rules(self, rules: CompiledRulePack) -> None:
+        # One assignment: check() reads self.rules once, so a request never
+        # mixes two packs
+        self.rules = rules
+
+    @property
+    def compiled_patterns(self) -> list[tuple[re.Pattern, str, float]]:
+        return self.rules.injection
+
+    @property
+    def scanner(self) -> MultiPatternScanner:
+        return self.rules.injection_scanner
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}:{self.rules.fingerprint}"
 
     async def check(self, content: str, context: RequestContext) -> GuardResult:
         start = time.perf_counter()
+        rules = self.rules
+        pack_version = rules.pack.version
+        view = ContentView.of(content)
+
+        # First rule in list order wins - same verdict as searching one by one.
+        # Rules see the normalized text, so obfuscated spellings match too
+        found: dict[str, int] = {}
+        try:
+            if self.limits:
+                budget = self.limits.begin(content)
+                normalized = self.limits.normalize(view, budget)
+            else:
+                budget, normalized = None, view.normalized
+            folded = view.folded
+            matched = rules.injection_scanner.first_match(normalized, folded, found, budget)
+        except EvaluationLimitExceeded as e:
+            return replace(self._limit_result(e, start), rule_pack_version=pack_version)
 
-        for pattern, category, base_confidence in self.compiled_patterns:
-            if pattern.search(content):
-                # Adjust confidence based on context
-                confidence = self._adjust_confidence(base_confidence, context)
-
-                return GuardResult(
-                    action=GuardAction.BLOCK if confidence > 0.8 else GuardAction.REVIEW,
-                    reason=f"Pattern match: {category}",
-                    confidence=confidence,
-                    latency_ms=(time.perf_counter() - start) * 1000,
-                    guard_name=self.name,
-                    metadata={"category": category, "pattern_matched": True},
-                )
+        if matched is not None:
+            _, category, base_confidence = rules.injection[matched]
+
+            # Adjust confidence based on context
+            confidence = self._adjust_confidence(base_confidence, context)
+
+            return GuardResult(
+                action=GuardAction.BLOCK if confidence > 0.8 else GuardAction.REVIEW,
+                reason=f"Pattern match: {category}",
+                confidence=confidence,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                guard_name=self.name,
+                metadata={"category": category, "pattern_matched": True},
+                rule_pack_version=pack_version,
+            )
 
+        # Near misses: rules whose required literals are present but which
+        # didn't match ("ignore" + "instructions", reworded). Free to compute
+        # - the gate lookups are memoized - and a useful signal for whether
+        # the expensive layers need to run (see CascadePolicy)
+        scanner = rules.injection_scanner
+        near_misses = sorted({
+            rules.injection[i][1]
+            for i in range(len(rules.injection))
+            if scanner.gates[i] is not None and scanner.passes_gate(i, folded, found)
+        })
         return GuardResult(
             action=GuardAction.ALLOW,
             reason="No patterns matched",
             confidence=1.0,
             latency_ms=(time.perf_counter() - start) * 1000,
             guard_name=self.name,
+            metadata={
+                "suspicion": min(1.0, self.NEAR_MISS_SUSPICION * len(near_misses)),
+                "near_misses": near_misses,
+            },
+            rule_pack_version=pack_version,
         )
 
     def _adjust_confidence(self, base: float, context: RequestContext) -> float:
@@ -214,6 +1264,326 @@ class RuleEngine(Guard):
 # =============================================================================
 
 
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into one batched call.
+
+    Each submit() waits until either max_batch_size items are queued or
+    max_wait_ms has passed since the first one, then the whole batch goes
+    to batch_fn in one call and results fan back out to each caller.
+
+    One model round-trip per batch instead of per request - the standard
+    way to get classifier throughput up under load. The cost is up to
+    max_wait_ms of added latency when traffic is light.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list[Any]], Any],  # async: list of items -> list of results
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: set[asyncio.Task] = set()
+
+        # Stats
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run(batch))
+        self._in_flight.add(task)  # Keep a reference until it finishes
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.batch_fn([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} items")
+            for (_, future), result in zip(batch, results):
+                if not future.done():  # Caller may have been cancelled meanwhile
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Cancelled (e.g. loop shutdown): no caller is left waiting forever
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Batch cancelled before it completed"))
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+
+class HashedNgramFeatures:
+    """
+    Text -> sparse, L2-normalized feature vector, with no vocabulary.
+
+    Character n-grams (over UTF-8 bytes) catch obfuscation that word
+    features miss ("ign0re", "i-g-n-o-r-e"); word uni/bigrams carry the
+    phrasing. Each gram is hashed into one of `dim` buckets with crc32 -
+    stable across processes, unlike hash() - so training and serving agree
+    without shipping a vocabulary.
+
+    Inputs longer than max_chars keep their head and tail: injections tend
+    to sit at either end, and feature cost stays bounded.
+    """
+
+    def __init__(
+        self,
+        dim: int = 2**18,
+        char_ngrams: tuple[int, int] = (3, 5),
+        word_ngrams: tuple[int, int] = (1, 2),
+        max_chars: int = 4096,
+    ):
+        if np is None:
+            raise ImportError("HashedNgramFeatures requires numpy (pip install numpy)")
+        self.dim = dim
+        self.char_ngrams = tuple(char_ngrams)
+        self.word_ngrams = tuple(word_ngrams)
+        self.max_chars = max_chars
+
+    def config(self) -> dict:
+        return {
+            "dim": self.dim,
+            "char_ngrams": list(self.char_ngrams),
+            "word_ngrams": list(self.word_ngrams),
+            "max_chars": self.max_chars,
+        }
+
+    def _grams(self, text: str) -> list[bytes]:
+        normalized = " ".join(text.lower().split())
+        if len(normalized) > self.max_chars:
+            half = self.max_chars // 2
+            normalized = f"{normalized[:half]} {normalized[-half:]}"
+
+        data = f" {normalized} ".encode()
+        grams = [
+            data[i:i + n]
+            for n in range(self.char_ngrams[0], self.char_ngrams[1] + 1)
+            for i in range(len(data) - n + 1)
+        ]
+        # \x01 keeps word grams from colliding with identical char grams
+        words = normalized.split()
+        grams += [
+            b"\x01" + " ".join(words[i:i + n]).encode()
+            for n in range(self.word_ngrams[0], self.word_ngrams[1] + 1)
+            for i in range(len(words) - n + 1)
+        ]
+        return grams
+
+    def transform(self, text: str) -> tuple["np.ndarray", "np.ndarray"]:
+        """(bucket indices, weights) - sorted, unique, never empty."""
+        grams = self._grams(text)
+        if not grams:
+            return np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.float32)
+
+        buckets = np.fromiter(map(zlib.crc32, grams), dtype=np.int64, count=len(grams)) % self.dim
+        indices, counts = np.unique(buckets, return_counts=True)
+        values = np.log1p(counts).astype(np.float32)
+        values /= np.linalg.norm(values)
+        return indices, values
+
+    def transform_batch(self, texts: list[str]) -> tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """CSR layout: item i owns indices[offsets[i]:offsets[i + 1]]."""
+        rows = [self.transform(text) for text in texts]
+        lengths = [len(indices) for indices, _ in rows]
+        offsets = np.zeros(len(rows), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        return (
+            np.concatenate([indices for indices, _ in rows]),
+            np.concatenate([values for _, values in rows]),
+            offsets,
+        )
+
+
+class LocalClassifierModel:
+    """
+    On-CPU classifier: one logistic regression per category over
+    HashedNgramFeatures. Replaces the network hop to a moderation API.
+
+    Scoring is a gather and a segmented sum - weights[indices] * values,
+    summed per item, plus bias, through a sigmoid - so a batch of any size
+    is a handful of NumPy calls. Weights are memory-mapped: loading is
+    O(1) in model size, and every process serving the model shares the
+    same physical pages.
+
+    Train and export with train-local-classifier.py.
+    """
+
+    WEIGHTS_FILE = "weights.npy"
+    BIAS_FILE = "bias.npy"
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(
+        self,
+        categories: list[str],
+        weights: "np.ndarray",  # (features.dim, len(categories))
+        bias: "np.ndarray",  # (len(categories),)
+        features: HashedNgramFeatures,
+        version: Optional[str] = None,
+    ):
+        if weights.shape != (features.dim, len(categories)) or bias.shape != (len(categories),):
+            raise ValueError(
+                f"weights {weights.shape} / bias {bias.shape} don't match "
+                f"dim={features.dim} and {len(categories)} categories"
+            )
+        self.categories = list(categories)
+        self.weights = weights
+        self.bias = bias
+        self.features = features
+        self.version = version or self._digest(weights, bias)
+
+    @staticmethod
+    def _digest(weights: "np.ndarray", bias: "np.ndarray") -> str:
+        digest = hashlib.sha256(np.ascontiguousarray(weights).tobytes())
+        digest.update(np.ascontiguousarray(bias).tobytes())
+        return digest.hexdigest()[:16]
+
+    def logits_batch(self, texts: list[str]) -> "np.ndarray":
+        """(len(texts), len(categories)) raw scores."""
+        if not texts:
+            return np.zeros((0, len(self.categories)), dtype=np.float32)
+        indices, values, offsets = self.features.transform_batch(texts)
+        contributions = self.weights[indices] * values[:, None]
+        return np.add.reduceat(contributions, offsets, axis=0) + self.bias
+
+    def score_batch(self, texts: list[str]) -> list[dict[str, float]]:
+        return self.scores_from_logits(self.logits_batch(texts))
+
+    def scores_from_logits(self, logits: "np.ndarray") -> list[dict[str, float]]:
+        probabilities = 1.0 / (1.0 + np.exp(-logits))
+        return [dict(zip(self.categories, row.tolist())) for row in probabilities]
+
+    def score(self, text: str) -> dict[str, float]:
+        return self.score_batch([text])[0]
+
+    def save(self, directory: str | Path) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / self.WEIGHTS_FILE, np.ascontiguousarray(self.weights, dtype=np.float32))
+        np.save(directory / self.BIAS_FILE, np.ascontiguousarray(self.bias, dtype=np.float32))
+        manifest = {
+            "categories": self.categories,
+            "features": self.features.config(),
+            "version": self.version,
+        }
+        (directory / self.MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+
+    @classmethod
+    def load(cls, directory: str | Path, mmap: bool = True) -> LocalClassifierModel:
+        if np is None:
+            raise ImportError("LocalClassifierModel requires numpy (pip install numpy)")
+        directory = Path(directory)
+        manifest = json.loads((directory / cls.MANIFEST_FILE).read_text())
+        mmap_mode = "r" if mmap else None
+        return cls(
+            categories=manifest["categories"],
+            weights=np.load(directory / cls.WEIGHTS_FILE, mmap_mode=mmap_mode),
+            bias=np.load(directory / cls.BIAS_FILE),
+            features=HashedNgramFeatures(**manifest["features"]),
+            version=manifest["version"],  # Hashing mmapped weights would page them all in
+        )
+
+
+_worker_model: Optional[LocalClassifierModel] = None
+
+
+def _classifier_worker_init(model_path: str) -> None:
+    global _worker_model
+    _worker_model = LocalClassifierModel.load(model_path, mmap=True)
+
+
+def _classifier_worker_logits(texts: list[str]) -> "np.ndarray":
+    return _worker_model.logits_batch(texts).astype(np.float32)
+
+
+class ClassifierWorkerPool:
+    """
+    Runs LocalClassifierModel in worker processes, off the event loop.
+
+    Scoring a batch is pure CPU - in-process it stalls the loop that also
+    runs RuleEngine and serves HTTP. Workers take it instead:
+
+        - Weights: every worker maps the exported model file read-only
+          (np.load mmap_mode="r"). The OS page cache holds one copy shared
+          by all processes - nothing is copied per worker.
+        - Dispatch: a micro-batch goes over as a list of strings; scores
+          come back as one float32 array. No per-item round-trips.
+        - Backpressure: try_acquire() admits an item only while fewer than
+          max_queue_depth are queued or running. A full pool rejects
+          immediately rather than queueing latency onto every request -
+          ContentClassifier then returns a degraded (rule-only) verdict.
+
+    Call close() on shutdown (GuardrailsPipeline.close() does).
+    """
+
+    def __init__(self, model_path: str | Path, workers: int = 2, max_queue_depth: int = 256):
+        self.model_path = str(model_path)
+        # Parent's mapping: categories, version, logits -> scores
+        self.model = LocalClassifierModel.load(self.model_path, mmap=True)
+        self.workers = workers
+        self.max_queue_depth = max_queue_depth
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_classifier_worker_init,
+            initargs=(self.model_path,),
+        )
+        self.depth = 0  # Items admitted and not yet scored
+        self.rejected = 0
+
+    @property
+    def saturated(self) -> bool:
+        return self.depth >= self.max_queue_depth
+
+    def try_acquire(self) -> bool:
+        if self.saturated:
+            self.rejected += 1
+            return False
+        self.depth += 1
+        return True
+
+    def release(self) -> None:
+        self.depth -= 1
+
+    async def score_batch(self, texts: list[str]) -> list[dict[str, float]]:
+        loop = asyncio.get_running_loop()
+        logits = await loop.run_in_executor(self._executor, _classifier_worker_logits, texts)
+        return self.model.scores_from_logits(logits)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
 class ContentClassifier(Guard):
     """
     ML-based content classification for catching novel attacks.
@@ -221,7 +1591,10 @@ class ContentClassifier(Guard):
     In production, this calls your classification model (fine-tuned BERT,
     custom classifier, or a classification API like OpenAI Moderation).
 
-    This example shows the interface - replace with your actual model.
+    With `local_model`, scoring runs in-process on CPU (LocalClassifierModel)
+    - no network hop; with `worker_pool`, it runs in worker processes
+    (ClassifierWorkerPool). Otherwise this example uses a mock - replace
+    with your actual model.
     """
 
     # Categories to classify
@@ -233,10 +1606,35 @@ class ContentClassifier(Guard):
         "off_topic",
     ]
 
-    def __init__(self, model_endpoint: Optional[str] = None, threshold: float = 0.7):
+    def __init__(
+        self,
+        model_endpoint: Optional[str] = None,
+        threshold: float = 0.7,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        local_model: Optional[LocalClassifierModel] = None,
+        worker_pool: Optional[ClassifierWorkerPool] = None,
+    ):
         super().__init__("content_classifier")
         self.model_endpoint = model_endpoint
         self.threshold = threshold
+        self.worker_pool = worker_pool
+        self.local_model = worker_pool.model if worker_pool else local_model
+
+        if self.local_model is not None:
+            unknown = set(self.local_model.categories) - set(self.CATEGORIES)
+            if unknown:
+                raise ValueError(f"Local model has unknown categories: {sorted(unknown)}")
+
+        if worker_pool is not None:
+            batch_fn = self._pool_classify_batch
+        elif local_model is not None:
+            batch_fn = self._local_classify_batch
+        else:
+            batch_fn = self._mock_classify_batch
+
+        # Concurrent check() calls share one inference call
+        self.batcher = MicroBatcher(batch_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
 
     async def check(self, content: str, context: RequestContext) -> GuardResult:
         start = time.perf_counter()
@@ -244,8 +1642,24 @@ class ContentClassifier(Guard):
         # In production: call your classification model
         # scores = await self._call_classifier(content)
 
-        # Placeholder: simulate classification
-        scores = await self._mock_classify(content)
+        # Saturated worker pool: skip rather than queue - the rest of the
+        # pipeline still gives a rule-only verdict
+        if self.worker_pool is not None and not self.worker_pool.try_acquire():
+            return GuardResult(
+                action=GuardAction.ALLOW,
+                reason="Classifier saturated - skipped",
+                confidence=0.0,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                guard_name=self.name,
+                metadata={"degraded": True, "queue_depth": self.worker_pool.depth},
+            )
+
+        # Placeholder: simulate classification (micro-batched)
+        try:
+            scores = await self.batcher.submit(ContentView.of(content))
+        finally:
+            if self.worker_pool is not None:
+                self.worker_pool.release()
 
         # Find highest-risk category
         max_category = max(scores, key=scores.get)
@@ -273,16 +1687,31 @@ class ContentClassifier(Guard):
             metadata={"scores": scores},
         )
 
-    async def _mock_classify(self, content: str) -> dict[str, float]:
-        """Mock classifier - replace with real model in production."""
-        # Simulate ~50ms latency
+    @property
+    def version(self) -> str:
+        # Computed live - changing the threshold invalidates cached verdicts
+        model_version = self.local_model.version if self.local_model else None
+        return _fingerprint(self.name, self.model_endpoint, model_version, self.threshold)
+
+    async def _local_classify_batch(self, views: list[ContentView]) -> list[dict[str, float]]:
+        """In-process inference - sub-millisecond per item, no I/O."""
+        return self.local_model.score_batch([view.normalized for view in views])
+
+    async def _pool_classify_batch(self, views: list[ContentView]) -> list[dict[str, float]]:
+        # Plain strings - cheaper to pickle than views
+        return await self.worker_pool.score_batch([view.normalized for view in views])
+
+    async def _mock_classify_batch(self, views: list[ContentView]) -> list[dict[str, float]]:
+        """Mock batched inference - one ~50ms round-trip for the whole batch."""
         await asyncio.sleep(0.05)
+        return [self._mock_scores(view) for view in views]
 
+    def _mock_scores(self, view: ContentView) -> dict[str, float]:
         # Simple heuristic for demo - real classifier uses embeddings
-        lower = content.lower()
+        lower = view.folded
         return {
             "prompt_injection": 0.9 if "ignore" in lower and "instruction" in lower else 0.1,
-            "jailbreak_attempt": 0.8 if "DAN" in content else 0.05,
+            "jailbreak_attempt": 0.8 if "DAN" in view.normalized else 0.05,
             "harmful_content": 0.1,
             "pii_disclosure_request": 0.2 if "ssn" in lower or "password" in lower else 0.05,
             "off_topic": 0.1,
@@ -290,88 +1719,420 @@ class ContentClassifier(Guard):
 
 
 # =============================================================================
-# Layer 3: Output Guards
+# Layer 2b: LLM-as-Guard (Expensive, High-Stakes Paths Only)
 # =============================================================================
 
 
-class OutputGuard(Guard):
-    """
-    Checks LLM outputs before they reach the user.
+@dataclass
+class LLMVerdict:
+    action: GuardAction  # ALLOW, REVIEW or BLOCK
+    reason: str
+    confidence: float
+    cost: float = 0.0  # Actual spend for this item, in budget units
 
-    Catches:
-        - Leaked system prompts
-        - PII in outputs
-        - Harmful content generation
-        - Hallucinated sensitive data
+
+class LLMGuardBackend(ABC):
+    """
+    The model call behind LLMGuard. One call judges a whole batch - put
+    the items in one prompt (numbered), parse one verdict per item.
     """
 
-    # Patterns that should never appear in outputs
-    FORBIDDEN_OUTPUT_PATTERNS = [
-        (r"my\s+system\s+prompt\s+is", "system_prompt_leak"),
-        (r"I\s+was\s+instructed\s+to", "instruction_leak"),
-        (r"my\s+instructions\s+(are|say|tell)", "instruction_leak"),
-    ]
+    @abstractmethod
+    async def judge_batch(self, items: list[tuple[str, RequestContext]]) -> list[LLMVerdict]:
+        pass
 
-    # PII patterns - tune based on your jurisdiction
-    PII_PATTERNS = [
-        (r"\b\d{3}-\d{2}-\d{4}\b", "ssn"),  # US SSN
-        (r"\b\d{9}\b", "potential_ssn"),
-        (r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", "email"),
-        (r"\b\d{16}\b", "credit_card"),
-        (r"\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b", "credit_card"),
-    ]
+    def estimate_cost(self, content: str) -> float:
+        """Upper-bound spend for one item - reserved before the call, settled against after (so keep it deterministic)."""
+        return 0.0
 
-    def __init__(self, redact_pii: bool = True):
-        super().__init__("output_guard")
-        self.redact_pii = redact_pii
-        self.compiled_forbidden = [
-            (re.compile(p, re.IGNORECASE), cat) for p, cat in self.FORBIDDEN_OUTPUT_PATTERNS
-        ]
-        self.compiled_pii = [
-            (re.compile(p), cat) for p, cat in self.PII_PATTERNS
-        ]
+    @property
+    def version(self) -> str:
+        """Model + prompt version - part of LLMGuard's cache key."""
+        return type(self).__name__
+
+
+class MockLLMGuardBackend(LLMGuardBackend):
+    """Local stand-in - fixed latency per batch, keyword heuristic, token-priced cost."""
+
+    def __init__(self, latency_ms: float = 300.0, price_per_1k_tokens: float = 0.003):
+        self.latency_ms = latency_ms
+        self.price_per_1k_tokens = price_per_1k_tokens
+        self.calls = 0
+
+    PROMPT_TOKENS = 300  # Judge instructions, per item
+    SIGNALS = ("ignore", "instructions", "system prompt", "jailbreak", "no restrictions", "pretend")
+
+    def estimate_cost(self, content: str) -> float:
+        tokens = self.PROMPT_TOKENS + len(content) / 4
+        return tokens / 1000 * self.price_per_1k_tokens
+
+    async def judge_batch(self, items: list[tuple[str, RequestContext]]) -> list[LLMVerdict]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        verdicts = []
+        for content, _ in items:
+            folded = ContentView.of(content).folded
+            hits = sum(signal in folded for signal in self.SIGNALS)
+            action = GuardAction.BLOCK if hits >= 2 else GuardAction.REVIEW if hits else GuardAction.ALLOW
+            verdicts.append(
+                LLMVerdict(action, f"{hits} risk signals", 0.9 if hits else 0.8, self.estimate_cost(content))
+            )
+        return verdicts
 
-    async def check(self, content: str, context: RequestContext) -> GuardResult:
-        start = time.perf_counter()
 
-        # Check for forbidden patterns (system prompt leaks, etc.)
-        for pattern, category in self.compiled_forbidden:
-            if pattern.search(content):
-                return GuardResult(
-                    action=GuardAction.BLOCK,
-                    reason=f"Forbidden output pattern: {category}",
-                    confidence=0.95,
-                    latency_ms=(time.perf_counter() - start) * 1000,
-                    guard_name=self.name,
-                    metadata={"category": category},
-                )
+class TenantSpendBudget:
+    """
+    Per-tenant spend cap over a fixed window (default: per hour).
 
-        # Check for PII
-        pii_found = []
-        for pattern, category in self.compiled_pii:
-            if pattern.search(content):
-                pii_found.append(category)
+    try_reserve() takes the estimated cost before a call and fails once the
+    tenant's window is spent; settle() corrects to the actual cost. One
+    float per active tenant, reset each window.
+    """
 
-        if pii_found:
-            if self.redact_pii:
-                redacted = self._redact_content(content)
-                return GuardResult(
-                    action=GuardAction.REDACT,
-                    reason=f"PII detected: {', '.join(pii_found)}",
-                    confidence=0.9,
-                    latency_ms=(time.perf_counter() - start) * 1000,
-                    guard_name=self.name,
-                    metadata={"pii_types": pii_found, "redacted_output": redacted},
-                )
-            else:
-                return GuardResult(
-                    action=GuardAction.REVIEW,
-                    reason=f"PII detected: {', '.join(pii_found)}",
-                    confidence=0.9,
-                    latency_ms=(time.perf_counter() - start) * 1000,
-                    guard_name=self.name,
-                    metadata={"pii_types": pii_found},
-                )
+    def __init__(
+        self,
+        limit_per_window: float,
+        window_seconds: float = 3600.0,
+        tenant_limits: Optional[dict[str, float]] = None,  # Overrides per tenant
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limit_per_window = limit_per_window
+        self.window_seconds = window_seconds
+        self.tenant_limits = tenant_limits or {}
+        self.clock = clock
+        self._window = -1
+        self._spent: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _roll(self) -> None:
+        window = int(self.clock() // self.window_seconds)
+        if window != self._window:
+            self._window = window
+            self._spent.clear()
+
+    def try_reserve(self, tenant_id: str, amount: float) -> bool:
+        with self._lock:
+            self._roll()
+            spent = self._spent.get(tenant_id, 0.0)
+            if spent + amount > self.tenant_limits.get(tenant_id, self.limit_per_window):
+                return False
+            self._spent[tenant_id] = spent + amount
+            return True
+
+    def settle(self, tenant_id: str, reserved: float, actual: float) -> None:
+        with self._lock:
+            self._roll()  # A reservation from the previous window is simply dropped
+            if tenant_id in self._spent:
+                self._spent[tenant_id] = max(0.0, self._spent[tenant_id] + actual - reserved)
+
+    def spent(self, tenant_id: str) -> float:
+        with self._lock:
+            self._roll()
+            return self._spent.get(tenant_id, 0.0)
+
+
+class LLMGuard(Guard):
+    """
+    Asks an LLM to judge the input - the most capable guard and by far the
+    most expensive (hundreds of ms, real money per call).
+
+    Runs only where it pays for itself (see applies()):
+        - requests in run_tiers ("high", "critical" by default), or
+        - when an earlier layer was unsure: a REVIEW verdict, RuleEngine
+          near misses, a classifier score above ambiguous_score, or a
+          classifier skipped under load
+
+    Cost and latency controls:
+        - cache: verdicts by content digest + request type, so a repeated
+          prompt costs one call
+        - batching: concurrent checks share one backend call (MicroBatcher)
+        - concurrency cap: at most max_concurrency backend calls in flight;
+          past max_queue_depth waiting checks, new ones don't queue
+        - tenant budget: the estimated cost is reserved up front and
+          settled to the actual cost when the call returns (even for a
+          caller past its deadline); a tenant over budget gets no more
+          calls this window
+        - deadline: the caller waits at most deadline_ms (the call itself
+          continues and still fills the cache)
+
+    Whenever no verdict is available (deadline, budget, saturation,
+    backend error) the result follows fail_mode: "open" ALLOWs, "closed"
+    BLOCKs. Either way it is marked degraded, so it isn't cached.
+    """
+
+    def __init__(
+        self,
+        backend: LLMGuardBackend,
+        run_tiers: tuple[str, ...] = ("high", "critical"),
+        ambiguous_score: float = 0.4,
+        max_concurrency: int = 4,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 20.0,
+        max_queue_depth: Optional[int] = None,  # None = 2 full rounds of batches
+        deadline_ms: float = 2000.0,
+        fail_mode: str = "open",
+        budget: Optional[TenantSpendBudget] = None,
+        cache_size: int = 10_000,
+        cache_ttl_seconds: float = 3600.0,
+    ):
+        if fail_mode not in ("open", "closed"):
+            raise ValueError(f"Unknown fail mode: {fail_mode}")
+        super().__init__("llm_guard")
+        self.backend = backend
+        self.run_tiers = set(run_tiers)
+        self.ambiguous_score = ambiguous_score
+        self.max_queue_depth = (
+            max_queue_depth if max_queue_depth is not None else 2 * max_concurrency * max_batch_size
+        )
+        self.deadline_ms = deadline_ms
+        self.fail_mode = fail_mode
+        self.budget = budget
+        self.cache_size = cache_size
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self._cache: OrderedDict[tuple, tuple[float, LLMVerdict]] = OrderedDict()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self.batcher = MicroBatcher(self._judge_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+        # Stats
+        self.cache_hits = 0
+        self.fallbacks: dict[str, int] = {}
+
+    @property
+    def version(self) -> str:
+        return _fingerprint(self.name, self.backend.version, self.fail_mode)
+
+    def applies(self, context: RequestContext, prior: list[GuardResult]) -> bool:
+        if context.risk_tier in self.run_tiers:
+            return True
+        return any(self._ambiguous(result) for result in prior)
+
+    def _ambiguous(self, result: GuardResult) -> bool:
+        if result.action == GuardAction.REVIEW or result.metadata.get("degraded"):
+            return True
+        if result.action != GuardAction.ALLOW:
+            return False
+        if result.metadata.get("suspicion", 0.0) > 0:
+            return True
+        scores = result.metadata.get("scores")
+        return bool(scores) and max(scores.values()) >= self.ambiguous_score
+
+    @staticmethod
+    def _cache_key(view: ContentView, context: RequestContext) -> tuple:
+        return (view.digest, context.request_type)
+
+    async def check(self, content: str, context: RequestContext) -> GuardResult:
+        start = time.perf_counter()
+        view = ContentView.of(content)
+        key = self._cache_key(view, context)
+
+        entry = self._cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= self.cache_ttl_seconds:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._result(entry[1], start, cached=True)
+
+        if self._waiting >= self.max_queue_depth:
+            return self._fallback("saturated", start)
+
+        reserved = self.backend.estimate_cost(view)
+        if self.budget is not None and not self.budget.try_reserve(context.tenant_id, reserved):
+            return self._fallback("budget", start)
+
+        self._waiting += 1
+        try:
+            verdict = await asyncio.wait_for(self.batcher.submit((view, context)), self.deadline_ms / 1000)
+        except asyncio.TimeoutError:
+            return self._fallback("deadline", start)  # The call still runs - and settles
+        except Exception:
+            return self._fallback("error", start)
+        finally:
+            self._waiting -= 1
+        return self._result(verdict, start)
+
+    async def _judge_batch(self, items: list[tuple[ContentView, RequestContext]]) -> list[LLMVerdict]:
+        # Settled here, not in check(): a caller that hit the deadline has
+        # stopped waiting, but the call runs on and costs what it costs.
+        # Every item reserved its estimate in check() before submitting
+        verdicts: list[LLMVerdict] = []
+        try:
+            async with self._slots:
+                verdicts = await self.backend.judge_batch(items)
+        finally:
+            if self.budget is not None:
+                for i, (view, context) in enumerate(items):
+                    actual = verdicts[i].cost if i < len(verdicts) else 0.0
+                    self.budget.settle(context.tenant_id, self.backend.estimate_cost(view), actual)
+
+        # Cached here, not in check(): callers that hit the deadline still
+        # pay for the call, so the next identical request shouldn't
+        now = time.monotonic()
+        for (view, context), verdict in zip(items, verdicts):
+            key = self._cache_key(view, context)
+            self._cache[key] = (now, verdict)
+            self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return verdicts
+
+    def _result(self, verdict: LLMVerdict, start: float, cached: bool = False) -> GuardResult:
+        return GuardResult(
+            action=verdict.action,
+            reason=f"LLM judge: {verdict.reason}",
+            confidence=verdict.confidence,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            guard_name=self.name,
+            metadata={"llm_cached": cached, "cost": 0.0 if cached else verdict.cost},
+        )
+
+    def _fallback(self, reason: str, start: float) -> GuardResult:
+        self.fallbacks[reason] = self.fallbacks.get(reason, 0) + 1
+        return GuardResult(
+            action=GuardAction.BLOCK if self.fail_mode == "closed" else GuardAction.ALLOW,
+            reason=f"LLM guard unavailable ({reason}) - failing {self.fail_mode}",
+            confidence=0.0,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            guard_name=self.name,
+            metadata={"degraded": True, "fallback": reason},
+        )
+
+
+# =============================================================================
+# Layer 3: Output Guards
+# =============================================================================
+
+
+@dataclass
+class PiiSpan:
+    """One PII match in an output: content[start:end] is redacted."""
+
+    start: int
+    end: int
+    category: str
+
+    def to_dict(self) -> dict:
+        return {"start": self.start, "end": self.end, "category": self.category}
+
+
+class OutputGuard(Guard):
+    """
+    Checks LLM outputs before they reach the user.
+
+    Catches:
+        - Leaked system prompts
+        - PII in outputs
+        - Harmful content generation
+        - Hallucinated sensitive data
+
+    Detection and redaction share one span list: each PII pattern runs once
+    (gated like RuleEngine - no "@" means the email regex never runs),
+    overlaps are resolved, and the redacted output is built in one join.
+    Large RAG outputs used to pay for a search and then a sub per pattern.
+    """
+
+    # Patterns that should never appear in outputs
+    FORBIDDEN_OUTPUT_PATTERNS = [
+        (r"my\s+system\s+prompt\s+is", "system_prompt_leak"),
+        (r"I\s+was\s+instructed\s+to", "instruction_leak"),
+        (r"my\s+instructions\s+(are|say|tell)", "instruction_leak"),
+    ]
+
+    # PII patterns - tune based on your jurisdiction
+    PII_PATTERNS = [
+        (r"\b\d{3}-\d{2}-\d{4}\b", "ssn"),  # US SSN
+        (r"\b\d{9}\b", "potential_ssn"),
+        (r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", "email"),
+        (r"\b\d{16}\b", "credit_card"),
+        (r"\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b", "credit_card"),
+    ]
+
+    def __init__(
+        self,
+        redact_pii: bool = True,
+        limits: Optional[EvaluationLimits] = None,
+        rule_pack: Optional[RulePack] = None,  # None = the class pattern lists
+        cache_dir: Optional[str | Path] = None,
+        cache_key: Optional[bytes] = None,
+        rules: Optional[CompiledRulePack] = None,  # Already compiled (shared with RuleEngine)
+    ):
+        super().__init__("output_guard")
+        self.redact_pii = redact_pii
+        self.limits = limits
+        self.cache_dir = cache_dir
+        self.cache_key = cache_key
+        self.swap_rules(rules or self.compile_rules(rule_pack or RulePack.builtin()))
+
+    def compile_rules(self, pack: RulePack) -> CompiledRulePack:
+        return compile_rule_pack(pack, self.limits, self.cache_dir, self.cache_key)
+
+    def swap_rules(self, rules: CompiledRulePack) -> None:
+        self.rules = rules  # Atomic - see RuleEngine.swap_rules
+
+    @property
+    def compiled_forbidden(self) -> list[tuple[re.Pattern, str]]:
+        return self.rules.forbidden
+
+    @property
+    def compiled_pii(self) -> list[tuple[re.Pattern, str]]:
+        return self.rules.pii
+
+    @property
+    def forbidden_scanner(self) -> MultiPatternScanner:
+        return self.rules.forbidden_scanner
+
+    @property
+    def pii_scanner(self) -> MultiPatternScanner:
+        return self.rules.pii_scanner
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}:{self.rules.fingerprint}:{self.redact_pii}"
+
+    async def check(self, content: str, context: RequestContext) -> GuardResult:
+        start = time.perf_counter()
+        rules = self.rules
+        pack_version = rules.pack.version
+
+        view = ContentView.of(content)
+
+        try:
+            budget = None
+            if self.limits:
+                budget = self.limits.begin(content)
+                self.limits.normalize(view, budget)
+            hit, spans = self._scan(view, rules, budget)
+        except EvaluationLimitExceeded as e:
+            return replace(self._limit_result(e, start), rule_pack_version=pack_version)
+
+        if hit is not None:
+            category = rules.forbidden[hit][1]
+            return GuardResult(
+                action=GuardAction.BLOCK,
+                reason=f"Forbidden output pattern: {category}",
+                confidence=0.95,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                guard_name=self.name,
+                metadata={"category": category},
+                rule_pack_version=pack_version,
+            )
+
+        if spans:
+            pii_found = list(dict.fromkeys(span.category for span in spans))
+            metadata = {
+                "pii_types": pii_found,
+                "pii_spans": [span.to_dict() for span in spans],
+            }
+            if self.redact_pii:
+                metadata["redacted_output"] = self.redact_spans(content, spans)
+            return GuardResult(
+                action=GuardAction.REDACT if self.redact_pii else GuardAction.REVIEW,
+                reason=f"PII detected: {', '.join(pii_found)}",
+                confidence=0.9,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                guard_name=self.name,
+                metadata=metadata,
+                rule_pack_version=pack_version,
+            )
 
         return GuardResult(
             action=GuardAction.ALLOW,
@@ -379,15 +2140,927 @@ class OutputGuard(Guard):
             confidence=1.0,
             latency_ms=(time.perf_counter() - start) * 1000,
             guard_name=self.name,
+            rule_pack_version=pack_version,
         )
 
+    def find_pii_spans(
+        self,
+        content: str,
+        folded: Optional[str] = None,
+        found: Optional[dict[str, int]] = None,
+        pos: int = 0,
+        budget: Optional[CpuBudget] = None,
+        rules: Optional[CompiledRulePack] = None,  # Snapshot; default the live pack
+    ) -> list[PiiSpan]:
+        """
+        All PII matches in content[pos:], sorted and non-overlapping.
+
+        Overlaps (a 9-digit run inside a card number, an SSN inside an
+        email local part) go to the leftmost match, then the longest, then
+        the earlier entry in PII_PATTERNS.
+
+        With a budget (and limits), raises EvaluationLimitExceeded when spent.
+        """
+        if folded is None:
+            folded = MultiPatternScanner.fold(content)
+        if found is None:
+            found = {}
+        if rules is None:
+            rules = self.rules
+        scanner = rules.pii_scanner
+
+        def find(i: int, at: int) -> Optional[tuple[int, int]]:
+            if scanner.bounded is not None and budget is not None:
+                return scanner.bounded[i].find(content, at, budget)
+            match = rules.pii[i][0].search(content, at)
+            return match.span() if match else None
+
+        # Each pattern's next match at or after `covered` (None: no more).
+        # Once a span is taken, patterns whose next match started inside it
+        # search again from its end - a card number that overlapped a
+        # losing candidate is still found
+        upcoming = {
+            i: find(i, pos) for i in range(len(rules.pii)) if scanner.passes_gate(i, folded, found)
+        }
+        spans: list[PiiSpan] = []
+        covered = pos
+        while True:
+            for i, span in upcoming.items():
+                while span is not None and (span[0] < covered or span[0] == span[1]):
+                    # Stale, or empty (never worth redacting - step past it)
+                    span = find(i, max(covered, span[0] + (span[0] == span[1])))
+                upcoming[i] = span
+            live = [(span[0], -span[1], i) for i, span in upcoming.items() if span is not None]
+            if not live:
+                return spans
+            start, neg_end, i = min(live)
+            spans.append(PiiSpan(start, -neg_end, rules.pii[i][1]))
+            covered = -neg_end
+
+    def _scan(
+        self, view: ContentView, rules: CompiledRulePack, budget: Optional[CpuBudget], pos: int = 0
+    ) -> tuple[Optional[int], list[PiiSpan]]:
+        """(forbidden pattern index or None, PII spans from `pos` - empty on a forbidden hit)."""
+        # Forbidden patterns (system prompt leaks, etc.) on the normalized
+        # text; PII on the raw text, since redaction edits the raw content
+        found: dict[str, int] = {}
+        hit = rules.forbidden_scanner.first_match(view.normalized, view.folded, found, budget)
+        if hit is not None:
+            return hit, []
+        if view.normalization_changed:
+            folded, found = None, None  # Positions differ - fold the raw text instead
+        else:
+            folded = view.folded
+        return None, self.find_pii_spans(view, folded, found, pos=pos, budget=budget, rules=rules)
+
+    @staticmethod
+    def redact_spans(content: str, spans: list[PiiSpan], pos: int = 0) -> str:
+        """Build content[pos:] with each span replaced, in one join."""
+        parts = []
+        for span in spans:
+            parts.append(content[pos:span.start])
+            parts.append(f"[REDACTED:{span.category.upper()}]")
+            pos = span.end
+        parts.append(content[pos:])
+        return "".join(parts)
+
     def _redact_content(self, content: str) -> str:
         """Redact PII from content."""
-        result = content
-        for pattern, category in self.compiled_pii:
-            result = pattern.sub(f"[REDACTED:{category.upper()}]", result)
+        return self.redact_spans(content, self.find_pii_spans(content))
+
+
+@dataclass
+class StreamCheck:
+    """Outcome of feeding one chunk to a StreamingOutputGuard."""
+
+    action: GuardAction
+    text: str  # Safe to send to the user now (may be empty)
+    reason: Optional[str] = None
+    pii_types: list[str] = field(default_factory=list)
+
+    @property
+    def blocked(self) -> bool:
+        return self.action.is_blocking
+
+
+class StreamingOutputGuard:
+    """
+    Applies OutputGuard's checks to a token stream, chunk by chunk.
+
+    Buffering the whole response kills time-to-first-token; skipping the
+    check leaks PII. Instead, hold back only the last `window_chars` of
+    text - enough for a pattern split across chunks ("123-45-" + "6789")
+    to be seen whole - and release everything before it, redacted.
+
+    Guarantees:
+        - Delay bounded by window_chars (plus any match straddling the cut)
+        - Memory per stream bounded by window_chars + one chunk
+        - Matches longer than window_chars may be missed - size the window
+          to your longest pattern
+
+    Once a forbidden pattern is seen (or a limit is hit) the stream is
+    blocked: nothing more is released. Text already sent can't be recalled -
+    the caller should cut the connection or append a notice.
+
+    Usage:
+        stream = pipeline.open_output_stream(context)
+        async for chunk in llm_stream:
+            check = stream.feed(chunk)
+            if check.blocked:
+                break
+            send(check.text)
+        send(stream.finish().text)
+    """
+
+    CONTEXT_CHARS = 8  # Already-released text kept for \b and lookbehind
+
+    def __init__(self, output_guard: OutputGuard, window_chars: int = 64):
+        self.guard = output_guard
+        self.window_chars = window_chars
+        self._buffer = ""
+        self._context_len = 0  # Leading chars of _buffer already released
+        self._pii_types: set[str] = set()
+        self.blocked = False
+        self.block_action = GuardAction.BLOCK
+        self.block_reason: Optional[str] = None
+
+    def feed(self, chunk: str) -> StreamCheck:
+        return self._process(chunk, final=False)
+
+    def finish(self) -> StreamCheck:
+        """Flush the held-back tail at end of stream."""
+        return self._process("", final=True)
+
+    def _process(self, chunk: str, final: bool) -> StreamCheck:
+        if self.blocked:
+            return StreamCheck(self.block_action, "", self.block_reason)
+
+        self._buffer += chunk
+        buffer = self._buffer
+
+        try:
+            # The buffer is window_chars plus one chunk - admit it like any
+            # other output, normalized size included
+            view = ContentView(buffer)
+            budget = None
+            if self.guard.limits:
+                budget = self.guard.limits.begin(buffer)
+                self.guard.limits.normalize(view, budget)
+            rules = self.guard.rules
+            hit, spans = self.guard._scan(view, rules, budget, pos=self._context_len)
+        except EvaluationLimitExceeded as e:
+            return self._block(GuardAction.LIMIT_EXCEEDED, f"Evaluation limit exceeded: {e.limit}")
+
+        if hit is not None:
+            return self._block(GuardAction.BLOCK, f"Forbidden output pattern: {rules.forbidden[hit][1]}")
+
+        # Release everything except the hold-back window - but never cut a
+        # PII match in half
+        cut = len(buffer) if final else max(self._context_len, len(buffer) - self.window_chars)
+        for span in spans:
+            if span.start < cut < span.end:
+                cut = span.start
+        spans = [span for span in spans if span.end <= cut]
+        found = [span.category for span in spans]
+
+        self._pii_types.update(found)
+        if found and self.guard.redact_pii:
+            released = self.guard.redact_spans(buffer[:cut], spans, pos=self._context_len)
+        else:
+            released = buffer[self._context_len:cut]
+
+        # Keep a little released text as left context for the next scan
+        keep_from = max(0, cut - self.CONTEXT_CHARS)
+        self._buffer = buffer[keep_from:]
+        self._context_len = cut - keep_from
+
+        if found:
+            action = GuardAction.REDACT if self.guard.redact_pii else GuardAction.REVIEW
+            return StreamCheck(
+                action, released, f"PII detected: {', '.join(sorted(set(found)))}", sorted(set(found))
+            )
+        return StreamCheck(GuardAction.ALLOW, released)
+
+    def _block(self, action: GuardAction, reason: str) -> StreamCheck:
+        self.blocked = True
+        self.block_action = action
+        self.block_reason = reason
+        self._buffer = ""
+        return StreamCheck(action, "", reason)
+
+    @property
+    def pii_types(self) -> list[str]:
+        """Every PII category seen so far in this stream."""
+        return sorted(self._pii_types)
+
+
+# =============================================================================
+# Verdict Cache
+# =============================================================================
+
+
+class VerdictCache:
+    """
+    Caches pipeline verdicts by content digest.
+
+    Bot traffic and client retries send the same prompt over and over -
+    there is no reason to run every guard again on identical input.
+
+    Key: direction + content digest + each guard's name and version +
+    the guard execution mode + the RequestContext fields that change
+    verdicts (request_type, risk_tier, previous_violations). Execution
+    matters because guards like LLMGuard decide from earlier verdicts
+    whether to run, and in parallel there are none. A rule or threshold change alters the guard
+    version, so old entries simply stop matching and age out.
+
+    Bounded: LRU eviction at max_entries, and entries expire after
+    ttl_seconds so feedback from outside the cache (e.g. a user's
+    violation count) is picked up eventually.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, PipelineResult]] = OrderedDict()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved_ms = 0.0
+
+    @staticmethod
+    def digest(content: str) -> bytes:
+        return ContentView.of(content).digest
+
+    @staticmethod
+    def key(
+        direction: str, guards: list[Guard], content: str, context: RequestContext, execution: str
+    ) -> tuple:
+        return (
+            direction,
+            VerdictCache.digest(content),
+            tuple((guard.name, guard.version) for guard in guards if guard.enabled),
+            execution,
+            context.request_type,
+            context.risk_tier,
+            context.previous_violations,
+        )
+
+    def get(self, key: tuple) -> Optional[PipelineResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.latency_saved_ms += result.total_latency_ms
         return result
 
+    def put(self, key: tuple, result: PipelineResult) -> None:
+        self._entries[key] = (time.monotonic(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop everything - e.g. after an out-of-band policy change."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# =============================================================================
+# Session Scanning
+# =============================================================================
+
+
+@dataclass
+class SessionState:
+    scanned_chars: int  # Prefix of the conversation that passed the input guards
+    digest: bytes  # Of that prefix
+    tail: str  # Its last carry_chars, normalized - rescanned with the next turn
+    last_seen: float
+
+
+@dataclass
+class SessionScan:
+    """What to scan for one request, and the state to keep if it passes."""
+
+    key: tuple[str, str]
+    text: str  # Give this to the input guards instead of the content
+    incremental: bool  # False: first turn, or the history didn't extend the last one
+    next_state: SessionState  # Tail filled in on commit
+
+
+class SessionScanner:
+    """
+    Scans each conversation's history once, however many times it is resent.
+
+    Chat clients send the whole conversation every turn, so checking the
+    content as-is costs O(turns^2) over a session. Keyed by (tenant_id,
+    session_id), this remembers how much of the conversation has already
+    passed, and hands the guards only what's new - plus the last
+    carry_chars of what came before, so an injection split across two
+    turns ("Ignore all previous" / "instructions") still matches. The
+    tail is measured in normalized characters, so invisible padding at
+    the end of a turn can't push the start of an injection out of it.
+
+    Two client styles work:
+        - Full history each turn: the already-passed prefix is recognized
+          by its digest, so an edited history is rescanned in full.
+        - Only the new turn: it doesn't extend the history, so it is
+          scanned whole, after the carried-over tail.
+
+    State only advances when a request passes: a blocked turn resent in
+    the next request's history is scanned (and blocked) again.
+
+    Hashing the prefix is still linear in the history, but at C speed -
+    the regexes and the classifier only see the new text.
+
+    Memory is bounded: one small entry per active session, sessions idle
+    longer than idle_seconds are swept (a few per call, like
+    RateLimitGuard), and max_sessions evicts the least recently seen. An
+    evicted session's next turn is scanned in full.
+    """
+
+    SWEEP_PER_CALL = 4
+    SEPARATOR = "\n"  # Between the carried tail and a standalone turn
+
+    def __init__(
+        self,
+        carry_chars: int = 256,  # >= the longest match a rule should catch across turns
+        max_sessions: int = 100_000,
+        idle_seconds: float = 1800.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.carry_chars = carry_chars
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self._sessions: OrderedDict[tuple[str, str], SessionState] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Stats
+        self.chars_received = 0
+        self.chars_scanned = 0
+
+    @staticmethod
+    def _encode(text: str) -> bytes:
+        return text.encode("utf-8", "surrogatepass")
+
+    def begin(self, content: str, context: RequestContext) -> SessionScan:
+        key = (context.tenant_id, context.session_id)
+        with self._lock:
+            now = self.clock()
+            state = self._sessions.get(key)
+            if state is not None and now - state.last_seen > self.idle_seconds:
+                state = None
+
+        # Hash outside the lock - it's the expensive part
+        hasher = hashlib.blake2b(digest_size=16)
+        incremental = False
+        if state is not None and len(content) >= state.scanned_chars:
+            hasher.update(self._encode(content[:state.scanned_chars]))
+            incremental = hasher.digest() == state.digest
+
+        if incremental:
+            new = content[state.scanned_chars:]
+            text = state.tail + new
+        else:
+            new = content
+            text = f"{state.tail}{self.SEPARATOR}{content}" if state is not None else content
+            hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(self._encode(new))
+
+        self.chars_received += len(content)
+        self.chars_scanned += len(text)
+        return SessionScan(
+            key=key,
+            text=text,
+            incremental=incremental,
+            next_state=SessionState(
+                scanned_chars=len(content),
+                digest=hasher.digest(),
+                tail="",
+                last_seen=now,
+            ),
+        )
+
+    def commit(self, scan: SessionScan) -> None:
+        """Record that scan's content passed."""
+        # Only now: the guards have admitted the text, so its size is bounded
+        state = replace(scan.next_state, tail=self._tail(scan.text))
+        with self._lock:
+            self._sessions[scan.key] = state
+            self._sessions.move_to_end(scan.key)
+            self._sweep(self.clock())
+
+    def _tail(self, text: str) -> str:
+        """The last carry_chars of text as the rules see it."""
+        if self.carry_chars <= 0:
+            return ""
+        # Raw chars can normalize to nothing (U+200B), so widen the raw
+        # suffix until it yields enough
+        n = self.carry_chars
+        while True:
+            normalized = ContentView(text[-n:]).normalized
+            if len(normalized) >= self.carry_chars or n >= len(text):
+                return normalized[-self.carry_chars:]
+            n *= 2
+
+    def forget(self, context: RequestContext) -> None:
+        """Drop a session's state (e.g. conversation deleted) - its next turn is scanned in full."""
+        with self._lock:
+            self._sessions.pop((context.tenant_id, context.session_id), None)
+
+    def _sweep(self, now: float) -> None:
+        for _ in range(self.SWEEP_PER_CALL):
+            oldest_key, oldest = next(iter(self._sessions.items()))
+            if now - oldest.last_seen <= self.idle_seconds and len(self._sessions) <= self.max_sessions:
+                return
+            del self._sessions[oldest_key]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def scan_ratio(self) -> float:
+        """Characters scanned per character received (1.0 = no savings)."""
+        return self.chars_scanned / self.chars_received if self.chars_received else 0.0
+
+
+# =============================================================================
+# Cascade Policy
+# =============================================================================
+
+
+class TenantAttackRates:
+    """
+    Recent blocked-request rate per tenant, exponentially decayed.
+
+    Two floats per tenant (decayed blocked and total counts) - no event log.
+    A tenant under active attack stops qualifying for cascade skips within
+    a few requests, and recovers over a few half-lives.
+
+    Memory is bounded like SessionScanner: tenants idle longer than
+    idle_seconds (by then their counts have decayed to almost nothing) are
+    swept a few per call, and max_tenants evicts the least recently seen.
+    A forgotten tenant starts again at a zero rate.
+    """
+
+    SWEEP_PER_CALL = 4
+
+    def __init__(
+        self,
+        half_life_seconds: float = 300.0,
+        max_tenants: int = 100_000,
+        idle_seconds: Optional[float] = None,  # None = ten half-lives (counts down to 1/1024)
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.half_life_seconds = half_life_seconds
+        self.max_tenants = max_tenants
+        self.idle_seconds = idle_seconds if idle_seconds is not None else 10 * half_life_seconds
+        self.clock = clock
+        # tenant -> (blocked, total, at), least recently seen first
+        self._state: OrderedDict[str, tuple[float, float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _decayed(self, tenant_id: str, now: float) -> tuple[float, float]:
+        blocked, total, at = self._state.get(tenant_id, (0.0, 0.0, now))
+        decay = 0.5 ** ((now - at) / self.half_life_seconds)
+        return blocked * decay, total * decay
+
+    def observe(self, tenant_id: str, blocked: bool) -> None:
+        with self._lock:
+            now = self.clock()
+            decayed_blocked, decayed_total = self._decayed(tenant_id, now)
+            self._state[tenant_id] = (decayed_blocked + blocked, decayed_total + 1.0, now)
+            self._state.move_to_end(tenant_id)
+            self._sweep(now)
+
+    def _sweep(self, now: float) -> None:
+        for _ in range(self.SWEEP_PER_CALL):
+            oldest, (_, _, at) = next(iter(self._state.items()))
+            if now - at <= self.idle_seconds and len(self._state) <= self.max_tenants:
+                return
+            del self._state[oldest]
+
+    def rate(self, tenant_id: str) -> float:
+        with self._lock:
+            blocked, total = self._decayed(tenant_id, self.clock())
+        return blocked / total if total else 0.0
+
+    @property
+    def tracked_tenants(self) -> int:
+        return len(self._state)
+
+
+@dataclass
+class CascadeStats:
+    """What the cascade saved, and what it probably cost in recall."""
+
+    run: int = 0  # Policy said run
+    run_flagged: int = 0  # ...and the expensive guard flagged (REVIEW or worse)
+    skip_decisions: int = 0  # Policy said skip
+    skipped: int = 0  # ...and the call really was skipped (enforce mode)
+    sampled: int = 0  # ...but it ran anyway (shadow mode, or audit sample)
+    sampled_flagged: int = 0  # ...and flagged - a miss, had it been skipped
+
+    @property
+    def miss_rate(self) -> float:
+        """Fraction of skip decisions the expensive guard would have flagged."""
+        return self.sampled_flagged / self.sampled if self.sampled else 0.0
+
+    @property
+    def estimated_missed(self) -> float:
+        """Flags lost to calls actually skipped."""
+        return self.miss_rate * self.skipped
+
+    @property
+    def estimated_recall(self) -> float:
+        """Expensive-guard recall with every skip decision honored (1.0 = no loss)."""
+        expected_flags_skipped = self.miss_rate * self.skip_decisions
+        total = self.run_flagged + expected_flags_skipped
+        return self.run_flagged / total if total else 1.0
+
+    @property
+    def skip_rate(self) -> float:
+        decisions = self.run + self.skip_decisions
+        return self.skip_decisions / decisions if decisions else 0.0
+
+
+class CascadePolicy:
+    """
+    Decides whether an expensive guard runs, from what the cheap ones saw.
+
+    A ~50ms classifier call on every input is wasted when the rules found
+    nothing suspicious, the request is low-risk and the tenant isn't under
+    attack. An expensive guard is skipped only if all of these hold:
+
+        - context.risk_tier is in skip_tiers
+        - context.previous_violations <= max_previous_violations
+        - every earlier guard ALLOWed, without error, with suspicion
+          (RuleEngine's near-miss score) <= max_suspicion
+        - the tenant's recent block rate <= max_tenant_attack_rate
+
+    Modes:
+        - "shadow": decide, but run the guard anyway - measures exactly what
+          enforcing would have skipped and missed. Start here.
+        - "enforce": skip, except for an `audit_rate` sample that still runs
+          so the recall estimate stays live.
+
+    Applies to sequential execution - parallel mode starts every guard
+    before any result is known, so there is nothing to cascade on.
+    """
+
+    def __init__(
+        self,
+        mode: str = "shadow",
+        expensive_guards: tuple[str, ...] = ("content_classifier",),
+        skip_tiers: tuple[str, ...] = ("low",),
+        max_suspicion: float = 0.0,
+        max_previous_violations: int = 0,
+        max_tenant_attack_rate: float = 0.05,
+        audit_rate: float = 0.02,
+        seed: Optional[int] = None,
+    ):
+        if mode not in ("shadow", "enforce"):
+            raise ValueError(f"Unknown cascade mode: {mode}")
+        self.mode = mode
+        self.expensive_guards = set(expensive_guards)
+        self.skip_tiers = set(skip_tiers)
+        self.max_suspicion = max_suspicion
+        self.max_previous_violations = max_previous_violations
+        self.max_tenant_attack_rate = max_tenant_attack_rate
+        self.audit_rate = audit_rate
+        self.attack_rates = TenantAttackRates()
+        self.stats = CascadeStats()
+        self._random = random.Random(seed)
+
+    def should_skip(self, context: RequestContext, prior: list[GuardResult]) -> bool:
+        if context.risk_tier not in self.skip_tiers:
+            return False
+        if context.previous_violations > self.max_previous_violations:
+            return False
+        if not prior:
+            return False  # No cheap evidence either way
+        for result in prior:
+            if result.action != GuardAction.ALLOW or result.metadata.get("error"):
+                return False
+            if result.metadata.get("suspicion", 0.0) > self.max_suspicion:
+                return False
+        return self.attack_rates.rate(context.tenant_id) <= self.max_tenant_attack_rate
+
+    def plan(self, guard: Guard, context: RequestContext, prior: list[GuardResult]) -> Optional[str]:
+        """None for cheap guards; else "run", "skip" or "sample" (run anyway, as a skip)."""
+        if guard.name not in self.expensive_guards:
+            return None
+        if not self.should_skip(context, prior):
+            return "run"
+
+        self.stats.skip_decisions += 1
+        if self.mode == "shadow" or self._random.random() < self.audit_rate:
+            return "sample"
+        self.stats.skipped += 1
+        return "skip"
+
+    def record(self, plan: str, result: GuardResult) -> None:
+        flagged = result.action != GuardAction.ALLOW and not result.metadata.get("error")
+        if plan == "run":
+            self.stats.run += 1
+            self.stats.run_flagged += flagged
+        elif plan == "sample":
+            self.stats.sampled += 1
+            self.stats.sampled_flagged += flagged
+
+    def skipped_result(self, guard: Guard) -> GuardResult:
+        return GuardResult(
+            action=GuardAction.ALLOW,
+            reason="Skipped by cascade policy",
+            confidence=0.0,
+            latency_ms=0.0,
+            guard_name=guard.name,
+            metadata={"skipped": True},
+        )
+
+    def observe(self, context: RequestContext, result: PipelineResult) -> None:
+        self.attack_rates.observe(context.tenant_id, result.blocked)
+
+
+# =============================================================================
+# Review Queue
+# =============================================================================
+
+
+@dataclass
+class ReviewItem:
+    """One distinct piece of content that needs a human - repeats only bump `count`."""
+
+    direction: str  # "input" / "output"
+    digest: str  # Hex content digest - with tenant_id and direction, the dedupe key
+    action: str  # Most severe attention-worthy verdict: "review" or "escalate"
+    reasons: list[str]
+    excerpt: str  # First excerpt_chars of the content
+    tenant_id: str
+    user_id: str
+    session_id: str
+    trace_id: str  # First occurrence
+    count: int = 1
+    first_seen: float = field(default_factory=time.time)
+    last_seen: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ReviewSink(ABC):
+    """Where review items end up. Called from a worker thread, one batch at a time."""
+
+    @abstractmethod
+    def write_batch(self, items: list[ReviewItem]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlReviewSink(ReviewSink):
+    """Appends one JSON line per item - the same digest can appear on several lines."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def write_batch(self, items: list[ReviewItem]) -> None:
+        with self.path.open("a") as f:
+            f.write("".join(json.dumps(item.to_dict()) + "\n" for item in items))
+
+
+class SqliteReviewSink(ReviewSink):
+    """
+    One row per (tenant_id, direction, digest); later batches add to the
+    row's count and raise its action to the most severe seen, so dedupe
+    holds across flushes and restarts. Tenants are never merged: each
+    one's reviewers see their own traffic.
+    """
+
+    @staticmethod
+    def _severity_sql(column: str) -> str:
+        ranks = " ".join(f"WHEN '{action.value}' THEN {action.severity}" for action in GuardAction)
+        return f"(CASE {column} {ranks} ELSE 0 END)"
+
+    def __init__(self, path: str | Path):
+        # One flusher writes at a time, so a shared connection is safe
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS review_items (
+                direction TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                action TEXT NOT NULL,
+                reasons TEXT NOT NULL,
+                excerpt TEXT NOT NULL,
+                tenant_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                trace_id TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (tenant_id, direction, digest)
+            )
+            """
+        )
+
+    def write_batch(self, items: list[ReviewItem]) -> None:
+        with self._db:  # One transaction per batch
+            self._db.executemany(
+                """
+                INSERT INTO review_items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (tenant_id, direction, digest) DO UPDATE SET
+                    count = count + excluded.count,
+                    last_seen = excluded.last_seen,
+                    action = CASE WHEN {new} > {old} THEN excluded.action ELSE action END
+                """.format(new=self._severity_sql("excluded.action"), old=self._severity_sql("action")),
+                [
+                    (
+                        item.direction, item.digest, item.action, json.dumps(item.reasons),
+                        item.excerpt, item.tenant_id, item.user_id, item.session_id,
+                        item.trace_id, item.count, item.first_seen, item.last_seen,
+                    )
+                    for item in items
+                ],
+            )
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class ReviewQueue:
+    """
+    Takes REVIEW / ESCALATE verdicts off the request path.
+
+    submit() is synchronous and O(1): it adds to an in-memory pending map
+    and returns. A background task writes pending items to the sink in
+    batches (batch_size items, or every flush_interval_seconds), in a
+    worker thread so file or database I/O never blocks the event loop.
+
+    Dedupe: pending items are keyed by (tenant, direction, content
+    digest). A flood of one attack is one item per tenant with a count,
+    not a flood of rows.
+
+    Bounded: at most max_pending distinct items wait. Past that, overflow
+    decides what is lost - "drop_new" (keep what's queued) or
+    "drop_oldest" (keep what's recent) - and `dropped` counts it. A batch
+    the sink fails to write is put back for the next flush, space
+    permitting.
+    """
+
+    def __init__(
+        self,
+        sink: ReviewSink,
+        max_pending: int = 10_000,
+        batch_size: int = 100,
+        flush_interval_seconds: float = 1.0,
+        overflow: str = "drop_new",
+        excerpt_chars: int = 500,
+    ):
+        if overflow not in ("drop_new", "drop_oldest"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.sink = sink
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.overflow = overflow
+        self.excerpt_chars = excerpt_chars
+        self._pending: OrderedDict[tuple[str, str, str], ReviewItem] = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+
+        # Stats
+        self.submitted = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.written = 0
+        self.write_errors = 0
+
+    def submit(self, direction: str, content: str, context: RequestContext, result: PipelineResult) -> bool:
+        """
+        Queue the result if any guard asked for attention. True if queued
+        (or merged); False once the queue is closed.
+        """
+        if self._closing:
+            return False
+        flagged = [r for r in result.results if r.requires_attention]
+        if not flagged:
+            return False
+
+        self.submitted += 1
+        key = (context.tenant_id, direction, ContentView.of(content).digest.hex())
+        action = (
+            GuardAction.ESCALATE.value
+            if any(r.action == GuardAction.ESCALATE for r in flagged)
+            else GuardAction.REVIEW.value
+        )
+
+        item = self._pending.get(key)
+        if item is not None:
+            item.count += 1
+            item.last_seen = time.time()
+            if action == GuardAction.ESCALATE.value:
+                item.action = action
+            self.deduplicated += 1
+            return True
+
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            if self.overflow == "drop_new":
+                return False
+            self._pending.popitem(last=False)
+
+        self._pending[key] = ReviewItem(
+            direction=direction,
+            digest=key[2],
+            action=action,
+            reasons=[r.reason for r in flagged],
+            excerpt=content[:self.excerpt_chars],
+            tenant_id=context.tenant_id,
+            user_id=context.user_id,
+            session_id=context.session_id,
+            trace_id=context.trace_id,
+        )
+        self._start()
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _start(self) -> None:
+        if not self._closing and (self._flusher is None or self._flusher.done()):
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything pending now, batch by batch."""
+        while self._pending:
+            batch = []
+            while self._pending and len(batch) < self.batch_size:
+                batch.append(self._pending.popitem(last=False)[1])
+            try:
+                await asyncio.to_thread(self.sink.write_batch, batch)
+            except Exception:
+                self.write_errors += 1
+                self._requeue(batch)
+                return  # Sink is down - retry on the next interval
+            self.written += len(batch)
+
+    def _requeue(self, batch: list[ReviewItem]) -> None:
+        for item in reversed(batch):
+            key = (item.tenant_id, item.direction, item.digest)
+            if key in self._pending:
+                self._pending[key].count += item.count
+                self._pending[key].first_seen = item.first_seen
+            elif len(self._pending) < self.max_pending:
+                self._pending[key] = item
+                self._pending.move_to_end(key, last=False)  # Oldest first again
+            else:
+                self.dropped += 1
+
+    async def close(self) -> None:
+        """Stop the background flusher, write what's pending, close the sink."""
+        # Let the flusher finish its current write rather than cancel it mid-batch
+        self._closing = True
+        if self._flusher is not None:
+            self._wakeup.set()
+            await self._flusher
+            self._flusher = None
+        await self.flush()
+        self.sink.close()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
 
 # =============================================================================
 # Pipeline Orchestration
@@ -405,15 +3078,98 @@ class GuardrailsConfig:
     # Short-circuit on first block (faster) vs run all guards (more telemetry)
     fail_fast: bool = True
 
+    # "sequential": cheapest - later guards skipped after a block
+    # "parallel": lowest latency - all guards start at once
+    # Override per request with RequestContext.guard_execution
+    guard_execution: str = "sequential"
+
     # Classifier settings
     classifier_threshold: float = 0.7
     classifier_endpoint: Optional[str] = None
+    classifier_max_batch_size: int = 32  # 1 disables micro-batching
+    classifier_max_wait_ms: float = 5.0  # Latency added to collect a batch
+    classifier_model_path: Optional[str] = None  # Local model dir; None = remote/mock
+    classifier_workers: int = 0  # >0: run the local model in worker processes
+    classifier_max_queue_depth: int = 256  # Pool full -> classifier skipped (rule-only)
+
+    # LLM-as-guard: high/critical tiers and ambiguous verdicts only (see LLMGuard)
+    enable_llm_guard: bool = False
+    llm_guard_backend: Optional[LLMGuardBackend] = None  # None = MockLLMGuardBackend
+    llm_guard_run_tiers: tuple[str, ...] = ("high", "critical")
+    llm_guard_ambiguous_score: float = 0.4
+    llm_guard_max_concurrency: int = 4
+    llm_guard_max_batch_size: int = 8
+    llm_guard_deadline_ms: float = 2000.0
+    llm_guard_fail_mode: str = "open"  # "closed" blocks when no verdict arrives in time
+    llm_guard_tenant_budget: Optional[float] = None  # Spend per tenant per hour; None = unlimited
 
     # Output settings
     redact_pii: bool = True
 
-    # Rate limiting per user (guards also have costs)
+    # Bounded evaluation - caps regex cost on adversarial content (see EvaluationLimits)
+    bounded_evaluation: bool = True
+    max_input_chars: int = 100_000
+    max_output_chars: int = 500_000
+    max_match_chars: int = 256
+    check_cpu_budget_ms: float = 100.0
+
+    # Cascade: skip expensive guards on low-risk, clean-looking input
+    # "off", "shadow" (measure only) or "enforce" - see CascadePolicy
+    cascade_mode: str = "off"
+    cascade_skip_tiers: tuple[str, ...] = ("low",)
+    cascade_max_tenant_attack_rate: float = 0.05
+    cascade_audit_rate: float = 0.02  # Skips still run in enforce mode, to estimate recall
+
+    # Rate limiting per (tenant, user) - guards also have costs (0 disables).
+    # Counts guarded items, not calls: each check_input_batch item is one
+    # request, since each costs a classifier call. Bulk callers that batch
+    # on behalf of a user need a higher limit (or their own tenant/user)
     max_requests_per_minute: int = 60
+    rate_limit_burst: Optional[int] = None  # None = one minute's worth
+
+    # Rule pack file (None = built-in rules) - reloaded when it changes
+    rule_pack_path: Optional[str] = None
+    rule_pack_cache_dir: Optional[str] = None  # Compiled-pattern cache shared by workers
+    rule_pack_cache_key: Optional[str] = None  # Secret that signs it (required with the dir)
+    rule_pack_poll_seconds: float = 5.0
+
+    # Session scanning: input guards see only what's new in a conversation
+    # (see SessionScanner). Carry >= max_match_chars keeps cross-turn matches
+    session_scanning: bool = False
+    session_carry_chars: int = 256
+    session_max_sessions: int = 100_000
+    session_idle_seconds: float = 1800.0
+
+    # Deadlines - a slow guard backend must not become request latency.
+    # Timeouts per guard name; the pipeline budget caps all guards together
+    # (override per request with RequestContext.latency_budget_ms)
+    guard_timeouts_ms: dict[str, float] = field(default_factory=dict)
+    default_guard_timeout_ms: Optional[float] = None  # None = no per-guard timeout
+    pipeline_latency_budget_ms: Optional[float] = None  # None = no pipeline budget
+    # Verdict for a guard that ran out of time: "allow", "review" or "block".
+    # Most specific key wins: "guard:tier", "guard", "*:tier", else the default
+    timeout_fallbacks: dict[str, str] = field(default_factory=dict)
+    default_timeout_fallback: str = "allow"
+
+    # REVIEW / ESCALATE verdicts go to this sink off the request path
+    # (see ReviewQueue); None = only in the returned PipelineResult
+    review_sink: Optional[ReviewSink] = None
+    review_queue_max_pending: int = 10_000
+    review_queue_batch_size: int = 100
+    review_queue_flush_interval_seconds: float = 1.0
+    review_queue_overflow: str = "drop_new"  # or "drop_oldest"
+
+    # Concurrent identical checks (same digest, guards and verdict-affecting
+    # context - the verdict cache key) share one evaluation
+    single_flight: bool = True
+
+    # Verdict cache for repeated identical content (0 disables)
+    verdict_cache_size: int = 10_000
+    verdict_cache_ttl_seconds: float = 300.0
+
+
+class _FlightAbandoned(Exception):
+    """The in-flight check a request was waiting on was cancelled - evaluate again."""
 
 
 class GuardrailsPipeline:
@@ -425,6 +3181,7 @@ class GuardrailsPipeline:
         2. Fail fast by default (configurable for audit trails)
         3. All results logged for analysis
         4. Graceful degradation if guards fail
+        5. Sequential or parallel execution, chosen per request
     """
 
     def __init__(self, config: GuardrailsConfig):
@@ -432,28 +3189,228 @@ class GuardrailsPipeline:
         self.input_guards: list[Guard] = []
         self.output_guards: list[Guard] = []
 
+        for fallback in [config.default_timeout_fallback, *config.timeout_fallbacks.values()]:
+            if fallback not in ("allow", "review", "block"):
+                raise ValueError(f"Unknown timeout fallback: {fallback}")
+
+        # Runs ahead of input guards and of the verdict cache - a cache hit
+        # still counts against the limit
+        self.rate_limiter: Optional[RateLimitGuard] = (
+            RateLimitGuard(config.max_requests_per_minute, burst=config.rate_limit_burst)
+            if config.max_requests_per_minute > 0
+            else None
+        )
+
+        input_limits = output_limits = None
+        if config.bounded_evaluation:
+            input_limits = EvaluationLimits(
+                max_chars=config.max_input_chars,
+                max_match_chars=config.max_match_chars,
+                cpu_budget_ms=config.check_cpu_budget_ms,
+            )
+            output_limits = replace(input_limits, max_chars=config.max_output_chars)
+
+        rule_pack = None
+        if config.rule_pack_path:
+            rule_pack = RulePack.from_file(config.rule_pack_path)
+        cache_dir = config.rule_pack_cache_dir
+        cache_key = config.rule_pack_cache_key.encode() if config.rule_pack_cache_key else None
+
+        # RuleEngine and OutputGuard scan with the same pack: compile it once.
+        # Their limits differ only in max_chars, which is checked per call
+        compile_rules = functools.partial(
+            compile_rule_pack, limits=input_limits, cache_dir=cache_dir, cache_key=cache_key
+        )
+        shared_rules = None
+        if config.enable_rule_engine or config.enable_output_guard:
+            shared_rules = compile_rules(rule_pack or RulePack.builtin())
+
         # Build input guard chain
         if config.enable_rule_engine:
-            self.input_guards.append(RuleEngine())
+            self.input_guards.append(
+                RuleEngine(
+                    limits=input_limits,
+                    rule_pack=rule_pack,
+                    cache_dir=cache_dir,
+                    cache_key=cache_key,
+                    rules=shared_rules,
+                )
+            )
+        self.classifier_pool: Optional[ClassifierWorkerPool] = None
         if config.enable_classifier:
+            local_model = None
+            if config.classifier_model_path and config.classifier_workers > 0:
+                self.classifier_pool = ClassifierWorkerPool(
+                    config.classifier_model_path,
+                    workers=config.classifier_workers,
+                    max_queue_depth=config.classifier_max_queue_depth,
+                )
+            elif config.classifier_model_path:
+                local_model = LocalClassifierModel.load(config.classifier_model_path)
             self.input_guards.append(
                 ContentClassifier(
                     model_endpoint=config.classifier_endpoint,
                     threshold=config.classifier_threshold,
+                    max_batch_size=config.classifier_max_batch_size,
+                    # In-process inference costs less than waiting for a batch
+                    # to fill; a zero wait still coalesces same-tick submissions
+                    max_wait_ms=0.0 if local_model else config.classifier_max_wait_ms,
+                    local_model=local_model,
+                    worker_pool=self.classifier_pool,
+                )
+            )
+
+        if config.enable_llm_guard:
+            self.input_guards.append(
+                LLMGuard(
+                    config.llm_guard_backend or MockLLMGuardBackend(),
+                    run_tiers=config.llm_guard_run_tiers,
+                    ambiguous_score=config.llm_guard_ambiguous_score,
+                    max_concurrency=config.llm_guard_max_concurrency,
+                    max_batch_size=config.llm_guard_max_batch_size,
+                    deadline_ms=config.llm_guard_deadline_ms,
+                    fail_mode=config.llm_guard_fail_mode,
+                    budget=(
+                        TenantSpendBudget(config.llm_guard_tenant_budget)
+                        if config.llm_guard_tenant_budget is not None
+                        else None
+                    ),
                 )
             )
 
         # Build output guard chain
         if config.enable_output_guard:
-            self.output_guards.append(OutputGuard(redact_pii=config.redact_pii))
+            self.output_guards.append(
+                OutputGuard(
+                    redact_pii=config.redact_pii,
+                    limits=output_limits,
+                    rule_pack=rule_pack,
+                    cache_dir=cache_dir,
+                    cache_key=cache_key,
+                    rules=shared_rules,
+                )
+            )
+
+        self.rule_reloader: Optional[RulePackReloader] = None
+        if rule_pack is not None:
+            self.rule_reloader = RulePackReloader(
+                config.rule_pack_path,
+                self.input_guards + self.output_guards,
+                poll_seconds=config.rule_pack_poll_seconds,
+                active=rule_pack,
+                compile=compile_rules,
+            )
+            self.rule_reloader.start()
+
+        self.cascade: Optional[CascadePolicy] = (
+            CascadePolicy(
+                mode=config.cascade_mode,
+                skip_tiers=config.cascade_skip_tiers,
+                max_tenant_attack_rate=config.cascade_max_tenant_attack_rate,
+                audit_rate=config.cascade_audit_rate,
+            )
+            if config.cascade_mode != "off"
+            else None
+        )
+
+        self.session_scanner: Optional[SessionScanner] = (
+            SessionScanner(
+                carry_chars=config.session_carry_chars,
+                max_sessions=config.session_max_sessions,
+                idle_seconds=config.session_idle_seconds,
+            )
+            if config.session_scanning
+            else None
+        )
+
+        self.review_queue: Optional[ReviewQueue] = (
+            ReviewQueue(
+                config.review_sink,
+                max_pending=config.review_queue_max_pending,
+                batch_size=config.review_queue_batch_size,
+                flush_interval_seconds=config.review_queue_flush_interval_seconds,
+                overflow=config.review_queue_overflow,
+            )
+            if config.review_sink is not None
+            else None
+        )
+
+        self.verdict_cache: Optional[VerdictCache] = (
+            VerdictCache(config.verdict_cache_size, config.verdict_cache_ttl_seconds)
+            if config.verdict_cache_size > 0
+            else None
+        )
+
+        # Single flight. Cascade skips and LLM-guard spend are decided per
+        # tenant, so with either on, only one tenant's callers share a flight
+        self._in_flight: dict[tuple, asyncio.Future] = {}
+        self._max_chars = (
+            {"input": config.max_input_chars, "output": config.max_output_chars}
+            if config.bounded_evaluation
+            else {}
+        )
+        self._flight_per_tenant = self.cascade is not None or any(
+            isinstance(guard, LLMGuard) and guard.budget is not None for guard in self.input_guards
+        )
+        self.evaluations = 0
+        self.coalesced_checks = 0
+
+    def close(self) -> None:
+        """Release worker processes and the rule pack watcher (if any)."""
+        if self.classifier_pool is not None:
+            self.classifier_pool.close()
+        if self.rule_reloader is not None:
+            self.rule_reloader.stop()
+
+    async def aclose(self) -> None:
+        """close(), after writing out pending review items."""
+        if self.review_queue is not None:
+            await self.review_queue.close()
+        self.close()
 
     async def check_input(self, content: str, context: RequestContext) -> PipelineResult:
         """Run input through all input guards."""
-        return await self._run_guards(self.input_guards, content, context)
+        limited = await self._rate_limit(content, context)
+        if limited is not None:
+            return limited
+        return await self._check_admitted_input(content, context)
+
+    async def _rate_limit(self, content: str, context: RequestContext) -> Optional[PipelineResult]:
+        """Count one request against the (tenant, user) limit; the rejection if over it."""
+        if self.rate_limiter is None:
+            return None
+        limited = await self.rate_limiter.check(content, context)
+        if not limited.blocked:
+            return None
+        return PipelineResult(
+            action=GuardAction.BLOCK,
+            results=[limited],
+            total_latency_ms=limited.latency_ms,
+            rejection_response=(
+                "You're sending requests too quickly. Please wait a moment and try again."
+            ),
+        )
+
+    async def _check_admitted_input(self, content: str, context: RequestContext) -> PipelineResult:
+        session_scan = None
+        if self.session_scanner is not None:
+            session_scan = self.session_scanner.begin(content, context)
+            content = session_scan.text
+
+        result = await self._run_cached("input", self.input_guards, content, context)
+        if self.review_queue is not None:
+            self.review_queue.submit("input", content, context, result)
+        if session_scan is not None and not result.blocked:
+            self.session_scanner.commit(session_scan)
+        if self.cascade is not None:
+            self.cascade.observe(context, result)
+        return result
 
     async def check_output(self, content: str, context: RequestContext) -> PipelineResult:
         """Run output through all output guards."""
-        result = await self._run_guards(self.output_guards, content, context)
+        result = await self._run_cached("output", self.output_guards, content, context)
+        if self.review_queue is not None:
+            self.review_queue.submit("output", content, context, result)
 
         # Extract redacted output if available
         if result.action == GuardAction.REDACT:
@@ -464,43 +3421,167 @@ class GuardrailsPipeline:
 
         return result
 
-    async def _run_guards(
-        self, guards: list[Guard], content: str, context: RequestContext
+    def open_output_stream(
+        self, context: RequestContext, window_chars: int = 64
+    ) -> Optional[StreamingOutputGuard]:
+        """Incremental output checking for streamed LLM responses (None if disabled)."""
+        for guard in self.output_guards:
+            if isinstance(guard, OutputGuard) and guard.enabled:
+                return StreamingOutputGuard(guard, window_chars=window_chars)
+        return None
+
+    async def check_input_batch(
+        self, contents: list[str], contexts: list[RequestContext]
+    ) -> list[PipelineResult]:
+        """
+        Check many inputs at once (contexts[i] goes with contents[i]).
+
+        Items run concurrently, so the classifier's micro-batcher sends
+        them as a few inference calls instead of one per item.
+
+        Each item counts as one request against its (tenant, user) rate
+        limit, exactly as if sent through check_input(). Items are admitted
+        in order before any guard runs, so when a batch overruns the limit
+        it is always the tail that gets the rate-limit rejection.
+        """
+        if len(contents) != len(contexts):
+            raise ValueError("contents and contexts must have the same length")
+        results = [await self._rate_limit(content, context) for content, context in zip(contents, contexts)]
+        admitted = [i for i, limited in enumerate(results) if limited is None]
+        checked = await asyncio.gather(
+            *(self._check_admitted_input(contents[i], contexts[i]) for i in admitted)
+        )
+        for i, result in zip(admitted, checked):
+            results[i] = result
+        return results
+
+    async def check_output_batch(
+        self, contents: list[str], contexts: list[RequestContext]
+    ) -> list[PipelineResult]:
+        """Check many outputs at once (contexts[i] goes with contents[i])."""
+        if len(contents) != len(contexts):
+            raise ValueError("contents and contexts must have the same length")
+        return list(
+            await asyncio.gather(
+                *(self.check_output(content, context) for content, context in zip(contents, contexts))
+            )
+        )
+
+    async def _run_cached(
+        self, direction: str, guards: list[Guard], content: str, context: RequestContext
     ) -> PipelineResult:
-        """Execute guards in sequence."""
-        start = time.perf_counter()
-        results: list[GuardResult] = []
-        final_action = GuardAction.ALLOW
+        """
+        Serve repeated content from the verdict cache, or from an identical
+        check already in flight; else run the guards.
+        """
+        # Normalized forms and the digest are computed once, shared by the
+        # cache key and every guard
+        content = ContentView.of(content)
+        if self.verdict_cache is None and not self.config.single_flight:
+            return await self._run_guards(guards, content, context)
+        if len(content) > self._max_chars.get(direction, math.inf):
+            # Rejected on length alone, and never cached - hashing a 1MB
+            # payload for the key would cost more than the check
+            return await self._run_guards(guards, content, context)
 
-        for guard in guards:
-            if not guard.enabled:
-                continue
+        start = time.perf_counter()
+        execution = context.guard_execution or self.config.guard_execution
+        key = VerdictCache.key(direction, guards, content, context, execution)
+        if self.verdict_cache is not None:
+            cached = self.verdict_cache.get(key)
+            if cached is not None:
+                return replace(
+                    cached,
+                    total_latency_ms=(time.perf_counter() - start) * 1000,
+                    cached=True,
+                    latency_saved_ms=cached.total_latency_ms,
+                )
 
+        if not self.config.single_flight:
+            return await self._evaluate(key, guards, content, context)
+
+        # Single flight: a bot flood sends the same payload hundreds of
+        # times before the first verdict is cached. The first caller runs
+        # the guards; identical callers meanwhile wait on its future instead
+        # of running every guard again. Only callers with the same latency
+        # budget share a flight: the leader started first, so its deadline
+        # is never later than a follower's own would be
+        flight_key = (*key, context.latency_budget_ms or self.config.pipeline_latency_budget_ms)
+        if self._flight_per_tenant:
+            flight_key += (context.tenant_id,)
+        flight = self._in_flight.get(flight_key)
+        if flight is not None:
+            self.coalesced_checks += 1
             try:
-                result = await guard.check(content, context)
-                results.append(result)
+                # Shielded: a waiter that goes away doesn't cancel the others
+                result = await asyncio.shield(flight)
+            except _FlightAbandoned:
+                self.coalesced_checks -= 1
+                return await self._run_cached(direction, guards, content, context)
+            return replace(result, total_latency_ms=(time.perf_counter() - start) * 1000, coalesced=True)
+
+        # The leader evaluates inline - no extra task on the common,
+        # uncontended path
+        flight = asyncio.get_running_loop().create_future()
+        self._in_flight[flight_key] = flight
+        self.evaluations += 1
+        try:
+            result = await self._evaluate(key, guards, content, context)
+        except BaseException as e:
+            # A cancelled leader mustn't cancel its waiters - they retry
+            flight.set_exception(_FlightAbandoned() if isinstance(e, asyncio.CancelledError) else e)
+            flight.exception()  # Mark retrieved - there may be no waiters
+            raise
+        finally:
+            del self._in_flight[flight_key]
+        flight.set_result(result)
+        return result
 
-                # Update final action (escalate severity)
-                if self._is_more_severe(result.action, final_action):
-                    final_action = result.action
+    async def _evaluate(
+        self, key: tuple, guards: list[Guard], content: str, context: RequestContext
+    ) -> PipelineResult:
+        result = await self._run_guards(guards, content, context)
+
+        # Guard errors, timeouts and CPU-limit verdicts are transient - don't
+        # pin them in the cache. Nor cascade skips: that was this tenant's
+        # decision, and the key has no tenant in it
+        if self.verdict_cache is not None and not any(
+            r.metadata.get("error")
+            or r.metadata.get("timeout")
+            or r.metadata.get("degraded")
+            or r.metadata.get("skipped")
+            or r.action == GuardAction.LIMIT_EXCEEDED
+            for r in result.results
+        ):
+            self.verdict_cache.put(key, result)
+        return result
 
-                # Short-circuit on block if configured
-                if self.config.fail_fast and result.action == GuardAction.BLOCK:
-                    break
+    @property
+    def coalescing_factor(self) -> float:
+        """Checks answered per guard-chain evaluation in single flight (1.0 = no coalescing)."""
+        return (self.evaluations + self.coalesced_checks) / self.evaluations if self.evaluations else 1.0
 
-            except Exception as e:
-                # Guard failure should not block the request (graceful degradation)
-                # But we log it for monitoring
-                results.append(
-                    GuardResult(
-                        action=GuardAction.ALLOW,  # Fail open
-                        reason=f"Guard error: {str(e)}",
-                        confidence=0.0,
-                        latency_ms=0,
-                        guard_name=guard.name,
-                        metadata={"error": True, "exception": str(e)},
-                    )
-                )
+    async def _run_guards(
+        self, guards: list[Guard], content: str, context: RequestContext
+    ) -> PipelineResult:
+        """Execute guards using the request's execution policy."""
+        start = time.perf_counter()
+        enabled = [guard for guard in guards if guard.enabled]
+
+        budget_ms = context.latency_budget_ms or self.config.pipeline_latency_budget_ms
+        deadline = start + budget_ms / 1000 if budget_ms else None
+
+        mode = context.guard_execution or self.config.guard_execution
+        if mode == "parallel" and len(enabled) > 1:
+            results = await self._run_parallel(enabled, content, context, deadline)
+        else:
+            results = await self._run_sequential(enabled, content, context, deadline)
+
+        final_action = GuardAction.ALLOW
+        for result in results:
+            # Update final action (escalate severity)
+            if self._is_more_severe(result.action, final_action):
+                final_action = result.action
 
         total_latency = (time.perf_counter() - start) * 1000
 
@@ -508,19 +3589,133 @@ class GuardrailsPipeline:
             action=final_action,
             results=results,
             total_latency_ms=total_latency,
-            rejection_response=self._get_rejection_response(final_action) if final_action == GuardAction.BLOCK else None,
+            rejection_response=self._get_rejection_response(final_action) if final_action.is_blocking else None,
+        )
+
+    async def _check_with_deadline(
+        self, guard: Guard, content: str, context: RequestContext, deadline: Optional[float]
+    ) -> GuardResult:
+        """guard.check(), cut off at its own timeout or the pipeline deadline, whichever is first."""
+        start = time.perf_counter()
+        timeout_ms = self.config.guard_timeouts_ms.get(guard.name, self.config.default_guard_timeout_ms)
+        timeout = timeout_ms / 1000 if timeout_ms is not None else None
+        if deadline is not None:
+            remaining = deadline - start
+            timeout = remaining if timeout is None else min(timeout, remaining)
+
+        if timeout is None:
+            return await guard.check(content, context)
+        if timeout <= 0:
+            return self._timeout_result(guard, context, start)  # Budget spent by earlier guards
+        try:
+            return await asyncio.wait_for(guard.check(content, context), timeout)
+        except asyncio.TimeoutError:
+            return self._timeout_result(guard, context, start)
+
+    def _timeout_result(self, guard: Guard, context: RequestContext, start: float) -> GuardResult:
+        fallbacks = self.config.timeout_fallbacks
+        tier = context.risk_tier
+        fallback = fallbacks.get(
+            f"{guard.name}:{tier}",
+            fallbacks.get(guard.name, fallbacks.get(f"*:{tier}", self.config.default_timeout_fallback)),
+        )
+        return GuardResult(
+            action=GuardAction(fallback),
+            reason=f"Guard timed out - fallback: {fallback}",
+            confidence=0.0,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            guard_name=guard.name,
+            metadata={"timeout": True},
+        )
+
+    async def _run_sequential(
+        self, guards: list[Guard], content: str, context: RequestContext, deadline: Optional[float] = None
+    ) -> list[GuardResult]:
+        """One guard at a time - cheapest, since a block skips the rest."""
+        results: list[GuardResult] = []
+
+        for guard in guards:
+            if not guard.applies(context, results):
+                continue
+
+            plan = self.cascade.plan(guard, context, results) if self.cascade else None
+            if plan == "skip":
+                results.append(self.cascade.skipped_result(guard))
+                continue
+
+            try:
+                result = await self._check_with_deadline(guard, content, context, deadline)
+            except Exception as e:
+                results.append(self._error_result(guard, e))
+                continue
+
+            results.append(result)
+            if plan is not None:
+                self.cascade.record(plan, result)
+
+            # Short-circuit on block if configured
+            if self.config.fail_fast and result.blocked:
+                break
+
+        return results
+
+    async def _run_parallel(
+        self, guards: list[Guard], content: str, context: RequestContext, deadline: Optional[float] = None
+    ) -> list[GuardResult]:
+        """
+        All guards at once - latency is the slowest guard, not the sum.
+
+        With fail_fast, the first BLOCK cancels the guards still running
+        (e.g. a rule hit at 1ms cancels the 50ms classifier call).
+        """
+        guards = [guard for guard in guards if guard.applies(context, [])]
+        tasks = {
+            asyncio.ensure_future(self._check_with_deadline(guard, content, context, deadline)): i
+            for i, guard in enumerate(guards)
+        }
+        results: dict[int, GuardResult] = {}
+        pending = set(tasks)
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                blocked = False
+                for task in done:
+                    i = tasks[task]
+                    try:
+                        results[i] = task.result()
+                    except Exception as e:
+                        results[i] = self._error_result(guards[i], e)
+                        continue
+                    blocked = blocked or results[i].blocked
+
+                if self.config.fail_fast and blocked:
+                    break
+        finally:
+            # Speculative work we no longer need (or the caller went away)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        # Report in guard order, not completion order
+        return [results[i] for i in sorted(results)]
+
+    def _error_result(self, guard: Guard, error: Exception) -> GuardResult:
+        # Guard failure should not block the request (graceful degradation)
+        # But we log it for monitoring
+        return GuardResult(
+            action=GuardAction.ALLOW,  # Fail open
+            reason=f"Guard error: {str(error)}",
+            confidence=0.0,
+            latency_ms=0,
+            guard_name=guard.name,
+            metadata={"error": True, "exception": str(error)},
         )
 
     def _is_more_severe(self, new: GuardAction, current: GuardAction) -> bool:
         """Check if new action is more severe than current."""
-        severity = {
-            GuardAction.ALLOW: 0,
-            GuardAction.REVIEW: 1,
-            GuardAction.REDACT: 2,
-            GuardAction.ESCALATE: 3,
-            GuardAction.BLOCK: 4,
-        }
-        return severity[new] > severity[current]
+        return new.severity > current.severity
 
     def _get_rejection_response(self, action: GuardAction) -> str:
         """Get user-facing rejection message."""
@@ -533,18 +3728,204 @@ class GuardrailsPipeline:
 # =============================================================================
 
 
+class LatencySketch:
+    """
+    Fixed-size latency histogram with bounded relative error (DDSketch-style).
+
+    Bucket i holds values in (gamma^(i-1), gamma^i], gamma = (1+a)/(1-a), so
+    any quantile is reported within `relative_accuracy` of the true value.
+    Covering 1us..10min at 1% takes ~1,000 integer counters - the same
+    whether it has seen ten samples or ten billion.
+
+    Recording is one log() and one increment. Merging is element-wise
+    addition, so sketches from different processes (or time slots) combine
+    exactly: quantiles of the merge equal quantiles of all samples together.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        min_value: float = 0.001,  # ms - smaller values share the lowest bucket
+        max_value: float = 600_000.0,  # ms - larger values share the highest
+    ):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._offset = math.ceil(math.log(min_value) / self._log_gamma)
+        self.counts = [0] * (self._index(max_value) + 1)
+        self.count = 0
+
+    def _index(self, value: float) -> int:
+        value = min(max(value, self.min_value), self.max_value)
+        return math.ceil(math.log(value) / self._log_gamma) - self._offset
+
+    def record(self, value: float) -> None:
+        self.counts[self._index(value)] += 1
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen > rank:
+                # Midpoint (in relative terms) of the bucket's range
+                return 2 * self.gamma ** (index + self._offset) / (self.gamma + 1)
+        return self.max_value
+
+    def _check_compatible(self, other: LatencySketch) -> None:
+        if (other.relative_accuracy, other.min_value, other.max_value) != (
+            self.relative_accuracy,
+            self.min_value,
+            self.max_value,
+        ):
+            raise ValueError("Cannot merge sketches with different accuracy or range")
+
+    def merge(self, other: LatencySketch) -> None:
+        self._check_compatible(other)
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+
+    def to_dict(self) -> dict:
+        """Compact form for shipping between processes (non-empty buckets only)."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "buckets": {i: c for i, c in enumerate(self.counts) if c},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> LatencySketch:
+        sketch = cls(data["relative_accuracy"], data["min_value"], data["max_value"])
+        for index, bucket_count in data["buckets"].items():
+            sketch.counts[int(index)] += bucket_count
+            sketch.count += bucket_count
+        return sketch
+
+
+class WindowedLatencySketch:
+    """
+    "p99 over the last 5 minutes": a ring of LatencySketch slots.
+
+    Samples go into the slot for the current time (slot = now // slot_seconds,
+    so every process agrees on slot boundaries); slots older than the window
+    are dropped. A quantile merges the live slots. Memory is fixed at
+    `slots` sketches.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300.0,
+        slots: int = 10,
+        relative_accuracy: float = 0.01,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.window_seconds = window_seconds
+        self.slots = slots
+        self.slot_seconds = window_seconds / slots
+        self.relative_accuracy = relative_accuracy
+        self.clock = clock
+        self._slots: dict[int, LatencySketch] = {}
+
+    def _current_slot(self) -> int:
+        return int(self.clock() // self.slot_seconds)
+
+    def _expire(self, current: int) -> None:
+        for slot in [s for s in self._slots if s <= current - self.slots]:
+            del self._slots[slot]
+
+    def record(self, value: float) -> None:
+        slot = self._current_slot()
+        sketch = self._slots.get(slot)
+        if sketch is None:
+            self._expire(slot)
+            sketch = self._slots[slot] = LatencySketch(self.relative_accuracy)
+        sketch.record(value)
+
+    def window(self) -> LatencySketch:
+        """One sketch of everything in the window."""
+        current = self._current_slot()
+        self._expire(current)
+        merged = LatencySketch(self.relative_accuracy)
+        for sketch in self._slots.values():
+            merged.merge(sketch)
+        return merged
+
+    def quantile(self, q: float) -> float:
+        return self.window().quantile(q)
+
+    @property
+    def count(self) -> int:
+        return self.window().count
+
+    def merge(self, other: WindowedLatencySketch) -> None:
+        """Fold in another process's sketch - slots line up by absolute time."""
+        if other.slot_seconds != self.slot_seconds:
+            raise ValueError("Cannot merge windowed sketches with different slot sizes")
+        for slot, sketch in other._slots.items():
+            if slot in self._slots:
+                self._slots[slot].merge(sketch)
+            else:
+                copy = LatencySketch(sketch.relative_accuracy, sketch.min_value, sketch.max_value)
+                copy.merge(sketch)
+                self._slots[slot] = copy
+        self._expire(self._current_slot())
+
+    def to_dict(self) -> dict:
+        return {
+            "window_seconds": self.window_seconds,
+            "slots": self.slots,
+            "relative_accuracy": self.relative_accuracy,
+            "sketches": {slot: sketch.to_dict() for slot, sketch in self._slots.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, clock: Callable[[], float] = time.time) -> WindowedLatencySketch:
+        windowed = cls(data["window_seconds"], data["slots"], data["relative_accuracy"], clock)
+        windowed._slots = {
+            int(slot): LatencySketch.from_dict(sketch) for slot, sketch in data["sketches"].items()
+        }
+        return windowed
+
+
 @dataclass
 class GuardrailsMetrics:
-    """Metrics to track for guardrails performance."""
+    """
+    Metrics to track for guardrails performance.
+
+    Latencies go into fixed-size windowed sketches, not lists: memory stays
+    constant at any traffic, and percentiles cover the recent window
+    (latency_window_seconds). Metrics from several worker processes combine
+    with merge().
+    """
 
     total_requests: int = 0
     blocked_requests: int = 0
     redacted_requests: int = 0
     review_requests: int = 0
+    limit_exceeded_requests: int = 0  # Also counted as blocked
+    degraded_checks: int = 0  # Guard skipped under load (e.g. classifier pool full)
+    guard_errors: int = 0  # Guard raised - backend failure
+    guard_timeouts: int = 0  # Guard cut off by its timeout or the pipeline budget
+
+    # Verdict cache
+    cache_hits: int = 0
+    cache_latency_saved_ms: float = 0.0
+
+    # Single flight - requests that waited on an identical in-flight check
+    coalesced_requests: int = 0
 
     # Per-guard metrics
-    guard_latencies: dict[str, list[float]] = field(default_factory=dict)
+    guard_latencies: dict[str, WindowedLatencySketch] = field(default_factory=dict)
     guard_block_counts: dict[str, int] = field(default_factory=dict)
+    guard_timeout_counts: dict[str, int] = field(default_factory=dict)
+    latency_window_seconds: float = 300.0
+    clock: Callable[[], float] = time.time
 
     # Pattern tracking
     block_reasons: dict[str, int] = field(default_factory=dict)
@@ -553,21 +3934,43 @@ class GuardrailsMetrics:
         """Record metrics from a pipeline result."""
         self.total_requests += 1
 
-        if result.action == GuardAction.BLOCK:
+        if result.blocked:
             self.blocked_requests += 1
+            if result.action == GuardAction.LIMIT_EXCEEDED:
+                self.limit_exceeded_requests += 1
         elif result.action == GuardAction.REDACT:
             self.redacted_requests += 1
         elif result.action == GuardAction.REVIEW:
             self.review_requests += 1
 
+        if result.cached:
+            self.cache_hits += 1
+            self.cache_latency_saved_ms += result.latency_saved_ms
+        if result.coalesced:
+            self.coalesced_requests += 1
+
         for guard_result in result.results:
-            # Latency tracking
-            if guard_result.guard_name not in self.guard_latencies:
-                self.guard_latencies[guard_result.guard_name] = []
-            self.guard_latencies[guard_result.guard_name].append(guard_result.latency_ms)
+            if guard_result.metadata.get("degraded"):
+                self.degraded_checks += 1
+            if guard_result.metadata.get("error"):
+                self.guard_errors += 1
+            if guard_result.metadata.get("timeout"):
+                self.guard_timeouts += 1
+                self.guard_timeout_counts[guard_result.guard_name] = (
+                    self.guard_timeout_counts.get(guard_result.guard_name, 0) + 1
+                )
+
+            # Latency tracking (cache hits and coalesced requests didn't run the guards)
+            if not result.cached and not result.coalesced:
+                sketch = self.guard_latencies.get(guard_result.guard_name)
+                if sketch is None:
+                    sketch = self.guard_latencies[guard_result.guard_name] = WindowedLatencySketch(
+                        self.latency_window_seconds, clock=self.clock
+                    )
+                sketch.record(guard_result.latency_ms)
 
             # Block tracking
-            if guard_result.action == GuardAction.BLOCK:
+            if guard_result.blocked:
                 self.guard_block_counts[guard_result.guard_name] = (
                     self.guard_block_counts.get(guard_result.guard_name, 0) + 1
                 )
@@ -575,6 +3978,19 @@ class GuardrailsMetrics:
                     self.block_reasons.get(guard_result.reason, 0) + 1
                 )
 
+    @property
+    def cache_hit_rate(self) -> float:
+        if self.total_requests == 0:
+            return 0.0
+        return self.cache_hits / self.total_requests
+
+    @property
+    def coalescing_factor(self) -> float:
+        """Requests answered per guard-chain evaluation, cache hits aside (1.0 = no coalescing)."""
+        answered = self.total_requests - self.cache_hits
+        evaluated = answered - self.coalesced_requests
+        return answered / evaluated if evaluated else 1.0
+
     @property
     def block_rate(self) -> float:
         """Percentage of requests blocked."""
@@ -582,14 +3998,47 @@ class GuardrailsMetrics:
             return 0.0
         return self.blocked_requests / self.total_requests
 
+    def get_latency_quantile(self, guard_name: str, q: float) -> float:
+        """Latency quantile for a guard over the recent window (within 1%)."""
+        sketch = self.guard_latencies.get(guard_name)
+        return sketch.quantile(q) if sketch else 0.0
+
     def get_p99_latency(self, guard_name: str) -> float:
         """Get P99 latency for a specific guard."""
-        latencies = self.guard_latencies.get(guard_name, [])
-        if not latencies:
-            return 0.0
-        sorted_latencies = sorted(latencies)
-        p99_index = int(len(sorted_latencies) * 0.99)
-        return sorted_latencies[min(p99_index, len(sorted_latencies) - 1)]
+        return self.get_latency_quantile(guard_name, 0.99)
+
+    def merge(self, other: GuardrailsMetrics) -> None:
+        """Add another process's metrics into this one."""
+        for name in (
+            "total_requests",
+            "blocked_requests",
+            "redacted_requests",
+            "review_requests",
+            "limit_exceeded_requests",
+            "degraded_checks",
+            "guard_errors",
+            "guard_timeouts",
+            "cache_hits",
+            "cache_latency_saved_ms",
+            "coalesced_requests",
+        ):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+        for counts, other_counts in (
+            (self.guard_block_counts, other.guard_block_counts),
+            (self.guard_timeout_counts, other.guard_timeout_counts),
+            (self.block_reasons, other.block_reasons),
+        ):
+            for key, value in other_counts.items():
+                counts[key] = counts.get(key, 0) + value
+
+        for guard_name, sketch in other.guard_latencies.items():
+            if guard_name in self.guard_latencies:
+                self.guard_latencies[guard_name].merge(sketch)
+            else:
+                merged = WindowedLatencySketch(self.latency_window_seconds, clock=self.clock)
+                merged.merge(sketch)
+                self.guard_latencies[guard_name] = merged
 
 
 # =============================================================================
@@ -645,12 +4094,41 @@ async def main():
         if result.blocked:
             print(f"  Response: {result.rejection_response}")
 
+    # Batch check - classifier calls are coalesced into one inference call
+    batch = [f"Question {i}: how do I sort a list in Python?" for i in range(16)]
+    batch_results = await pipeline.check_input_batch(batch, [context] * len(batch))
+    for result in batch_results:
+        metrics.record(result)
+    classifier = next(g for g in pipeline.input_guards if isinstance(g, ContentClassifier))
+    print(f"\nBatch of {len(batch)}: {max(r.total_latency_ms for r in batch_results):.2f}ms, "
+          f"avg classifier batch size {classifier.batcher.average_batch_size:.1f}")
+
+    # Bot flood - identical concurrent payloads share one evaluation
+    flood = ["Tell me about your refund policy"] * 50
+    bots = [replace(context, user_id=f"bot_{i}") for i in range(len(flood))]
+    flood_results = await pipeline.check_input_batch(flood, bots)
+    for result in flood_results:
+        metrics.record(result)
+    print(f"Flood of {len(flood)} identical: {sum(r.coalesced for r in flood_results)} coalesced, "
+          f"pipeline coalescing factor so far {pipeline.coalescing_factor:.1f}")
+
+    # Streaming output - the SSN is split across chunks but still redacted
+    stream = pipeline.open_output_stream(context)
+    emitted = [stream.feed(chunk).text for chunk in ["Your SSN is 123-4", "5-6789, keep it ", "safe."]]
+    emitted.append(stream.finish().text)
+    print(f"\nStreamed: {''.join(emitted)}")
+
     print("\n" + "=" * 60)
     print("Metrics Summary")
     print("=" * 60)
     print(f"Total requests: {metrics.total_requests}")
     print(f"Blocked: {metrics.blocked_requests} ({metrics.block_rate:.1%})")
     print(f"Block reasons: {metrics.block_reasons}")
+    print(f"Verdict cache hit rate: {metrics.cache_hit_rate:.1%} "
+          f"(saved {metrics.cache_latency_saved_ms:.1f}ms)")
+    print(f"Coalescing factor: {metrics.coalescing_factor:.2f}")
+    for guard_name in metrics.guard_latencies:
+        print(f"{guard_name} p99 (last 5 min): {metrics.get_p99_latency(guard_name):.2f}ms")
 
 
 if __name__ == "__main__":
@@ -15,6 +15,10 @@ Key design decisions:
     3. Checkpoints after each step (resumable on failure)
     4. Circuit breakers per agent (prevent cascade failures)
     5. Cost tracking at orchestration layer (global budget enforcement)
+    6. Steps route by capability (replicas share load, slow ones get skipped)
+    7. Agents warm up before traffic (clients and models loaded at boot)
+    8. Near-duplicate requests served from a semantic cache (optional, NumPy)
+    9. Token/cost estimated before each call (reject or downgrade up front)
 
 This is NOT:
     - A framework to import (adapt to your stack)
@@ -23,18 +27,40 @@ This is NOT:
 
 Usage:
     orchestrator = Orchestrator(agents, state_store, config)
+    await orchestrator.start()  # Warm up agents before taking traffic
     result = await orchestrator.execute(task, context)
+    await orchestrator.stop()
 """
 
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import re
+import selectors
+import tempfile
+import threading
 import time
 import uuid
+import zlib
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
-from typing import Any, Callable, Optional
+from typing import Any, Awaitable, Callable, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:  # Only the semantic cache needs NumPy
+    np = None
+
+try:
+    import tiktoken
+except ImportError:  # Token estimation falls back to a character heuristic
+    tiktoken = None
 
 # =============================================================================
 # Core Types
@@ -71,21 +97,27 @@ class ExecutionContext:
     cost_spent: float = 0.0
     token_budget: int = 100_000
     tokens_used: int = 0
+    cost_avoided: float = 0.0  # Spend skipped by cache hits
 
     # Timing
-    start_time: float = field(default_factory=time.time)
+    start_time: Optional[float] = None  # Defaults to clock() at creation
     timeout_seconds: float = 300.0  # 5 minutes max
+    clock: Callable[[], float] = field(default=time.time, repr=False)  # Swap for replay
 
     # Metadata
     metadata: dict = field(default_factory=dict)
 
+    def __post_init__(self):
+        if self.start_time is None:
+            self.start_time = self.clock()
+
     @property
     def budget_remaining(self) -> float:
         return self.cost_budget - self.cost_spent
 
     @property
     def time_remaining(self) -> float:
-        return self.timeout_seconds - (time.time() - self.start_time)
+        return self.timeout_seconds - (self.clock() - self.start_time)
 
     @property
     def is_timed_out(self) -> bool:
@@ -98,18 +130,49 @@ class ExecutionContext:
 
 @dataclass
 class Step:
-    """A single step in the execution plan."""
+    """
+    A single step in the execution plan.
+
+    agent_name pins the step to one agent. Leave it as None to let the
+    router pick the best replica that offers `action`.
+    """
 
     id: str
-    agent_name: str
+    agent_name: Optional[str]
     action: str
     inputs: dict
+    routed_to: Optional[str] = None  # Agent that actually ran the step
     status: StepStatus = StepStatus.PENDING
     result: Optional[dict] = None
     error: Optional[str] = None
     cost: float = 0.0
+    tokens_used: int = 0
     latency_ms: float = 0.0
+    attempt_latencies_ms: list[float] = field(default_factory=list)  # One per attempt, failures included
     retries: int = 0
+    started_at: Optional[float] = None
+    cache_hit: bool = False
+    cost_avoided: float = 0.0
+    estimated_tokens: int = 0
+    estimated_cost: float = 0.0
+    downgraded_to: Optional[str] = None  # Cheaper model chosen at pre-flight
+
+    def to_trace(self) -> dict:
+        """Timing/outcome record used for metrics export and trace replay."""
+        return {
+            "step_id": self.id,
+            "agent_name": self.routed_to or self.agent_name,
+            "action": self.action,
+            "status": self.status.value,
+            "started_at": self.started_at,
+            "latency_ms": self.latency_ms,
+            "attempt_latencies_ms": self.attempt_latencies_ms,
+            "cost": self.cost,
+            "tokens_used": self.tokens_used,
+            "retries": self.retries,
+            "error": self.error,
+            "cache_hit": self.cache_hit,
+        }
 
 
 @dataclass
@@ -208,6 +271,81 @@ class InMemoryStateStore(StateStore):
         self.checkpoints[plan_id] = step_index
 
 
+# =============================================================================
+# Shared Resources
+# =============================================================================
+
+
+class SharedResources:
+    """
+    Pool of long-lived clients shared by every agent.
+
+    Register a factory once (HTTP client, DB pool, model handle). The first
+    get() builds it; every later get() - from any agent - returns the same
+    instance. Concurrent first calls build it once, not once per caller.
+
+    Usage:
+        resources.register("http", lambda: httpx.AsyncClient(), close=lambda c: c.aclose())
+        client = await resources.get("http")
+    """
+
+    def __init__(self):
+        self._factories: dict[str, Callable[[], Union[Any, Awaitable[Any]]]] = {}
+        self._closers: dict[str, Callable[[Any], Union[None, Awaitable[None]]]] = {}
+        self._instances: dict[str, Any] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Union[Any, Awaitable[Any]]],
+        close: Optional[Callable[[Any], Union[None, Awaitable[None]]]] = None,
+    ) -> None:
+        self._factories[name] = factory
+        if close is not None:
+            self._closers[name] = close
+
+    async def get(self, name: str) -> Any:
+        if name in self._instances:
+            return self._instances[name]
+
+        if name not in self._factories:
+            raise KeyError(f"No shared resource registered: {name}")
+
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            if name not in self._instances:
+                instance = self._factories[name]()
+                if asyncio.iscoroutine(instance):
+                    instance = await instance
+                self._instances[name] = instance
+        return self._instances[name]
+
+    async def close_all(self) -> dict[str, str]:
+        """
+        Close instances in reverse creation order (dependents first).
+
+        A closer that raises doesn't stop the rest. Returns
+        {resource name: error} for the ones that failed.
+        """
+        errors: dict[str, str] = {}
+        for name in reversed(list(self._instances)):
+            instance = self._instances.pop(name)
+            closer = self._closers.get(name)
+            if closer is None:
+                continue
+            try:
+                outcome = closer(instance)
+                if asyncio.iscoroutine(outcome):
+                    await outcome
+            except Exception as e:
+                errors[name] = str(e) or type(e).__name__
+        return errors
+
+
 # =============================================================================
 # Agent Interface
 # =============================================================================
@@ -219,12 +357,26 @@ class Agent(ABC):
 
     Agents are specialists that perform specific tasks.
     They don't self-direct - the supervisor tells them what to do.
+
+    Lifecycle:
+        start() runs once at boot, before traffic. Open clients, load models,
+        import heavy dependencies here - not lazily inside execute().
+        stop() runs at shutdown and releases what start() acquired.
     """
 
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
         self.enabled = True
+        self.ready = False  # Set by the orchestrator after start() succeeds
+
+    async def start(self, resources: SharedResources) -> None:
+        """Warm up before traffic. Default: nothing to warm."""
+        pass
+
+    async def stop(self) -> None:
+        """Release anything acquired in start(). Default: nothing to release."""
+        pass
 
     @abstractmethod
     async def execute(
@@ -243,6 +395,16 @@ class Agent(ABC):
         """List of actions this agent can perform."""
         pass
 
+    @property
+    def pricing(self) -> dict[str, PricingModel]:
+        """
+        Per-action pricing for pre-flight estimation.
+
+        Actions without an entry skip pre-flight and are only accounted
+        for after the call returns. Default: none declared.
+        """
+        return {}
+
 
 # =============================================================================
 # Circuit Breaker
@@ -266,8 +428,9 @@ class CircuitBreaker:
         HALF_OPEN: Testing if agent recovered
     """
 
-    def __init__(self, config: CircuitBreakerConfig):
+    def __init__(self, config: CircuitBreakerConfig, clock: Callable[[], float] = time.time):
         self.config = config
+        self.clock = clock
         self.failure_count = 0
         self.last_failure_time: Optional[float] = None
         self.state = "closed"
@@ -280,7 +443,7 @@ class CircuitBreaker:
 
     def record_failure(self) -> None:
         self.failure_count += 1
-        self.last_failure_time = time.time()
+        self.last_failure_time = self.clock()
 
         if self.failure_count >= self.config.failure_threshold:
             self.state = "open"
@@ -293,7 +456,7 @@ class CircuitBreaker:
             # Check if we should transition to half-open
             if self.last_failure_time is None:
                 return False
-            if time.time() - self.last_failure_time > self.config.reset_timeout_seconds:
+            if self.clock() - self.last_failure_time > self.config.reset_timeout_seconds:
                 self.state = "half_open"
                 self.half_open_calls = 0
                 return True
@@ -308,6 +471,538 @@ class CircuitBreaker:
         return False
 
 
+# =============================================================================
+# Capability Routing
+# =============================================================================
+
+
+@dataclass
+class RoutingConfig:
+    ewma_alpha: float = 0.2  # Weight of the newest latency sample
+    initial_latency_ms: float = 100.0  # Prior for replicas with no history
+    cost_weight_ms_per_usd: float = 10_000.0  # $0.01 per call ~ 100ms of latency
+    degraded_breaker_penalty: float = 4.0  # Score multiplier while breaker not closed
+
+
+@dataclass
+class ReplicaStats:
+    """Rolling performance view of a single agent replica."""
+
+    ewma_latency_ms: Optional[float] = None
+    ewma_cost: Optional[float] = None
+    in_flight: int = 0
+    calls: int = 0
+
+    def observe(self, latency_ms: float, cost: Optional[float], alpha: float) -> None:
+        self.calls += 1
+        if self.ewma_latency_ms is None:
+            self.ewma_latency_ms = latency_ms
+        else:
+            self.ewma_latency_ms += alpha * (latency_ms - self.ewma_latency_ms)
+
+        # Failed calls report no cost - keep the last known price
+        if cost is None:
+            return
+        if self.ewma_cost is None:
+            self.ewma_cost = cost
+        else:
+            self.ewma_cost += alpha * (cost - self.ewma_cost)
+
+
+class AgentRouter:
+    """
+    Routes each step to the best agent replica for its action.
+
+    The index maps every action in Agent.capabilities to the agents that
+    offer it, so several replicas (or providers) can serve one capability.
+
+    Score (lower wins):
+        EWMA latency x (1 + in-flight calls) + cost weight x EWMA cost
+        x penalty if the replica's circuit breaker is open or half-open
+
+    Open breakers are still ranked (they may be due a half-open probe),
+    but should_allow() gets the final say before a replica is picked.
+    """
+
+    def __init__(
+        self,
+        agents: dict[str, Agent],
+        circuit_breakers: dict[str, CircuitBreaker],
+        config: RoutingConfig,
+    ):
+        self.agents = agents
+        self.circuit_breakers = circuit_breakers
+        self.config = config
+        self.stats: dict[str, ReplicaStats] = {name: ReplicaStats() for name in agents}
+
+        self.index: dict[str, list[str]] = {}
+        for name, agent in agents.items():
+            for action in agent.capabilities:
+                self.index.setdefault(action, []).append(name)
+
+    def candidates(self, step: Step) -> list[str]:
+        """Agents allowed to run this step (the pin, or every capable replica)."""
+        if step.agent_name is not None:
+            return [step.agent_name] if step.agent_name in self.agents else []
+        return [name for name in self.index.get(step.action, []) if self.agents[name].enabled]
+
+    def score(self, name: str) -> float:
+        stats = self.stats[name]
+        latency = (
+            stats.ewma_latency_ms
+            if stats.ewma_latency_ms is not None
+            else self.config.initial_latency_ms
+        )
+        cost = stats.ewma_cost or 0.0
+        score = latency * (1 + stats.in_flight) + self.config.cost_weight_ms_per_usd * cost
+
+        if self.circuit_breakers[name].state != "closed":
+            score *= self.config.degraded_breaker_penalty
+
+        return score
+
+    def select(self, candidates: list[str]) -> Optional[str]:
+        """Pick the lowest-scoring candidate whose circuit breaker lets it through."""
+        for name in sorted(candidates, key=self.score):
+            if self.circuit_breakers[name].should_allow():
+                return name
+        return None
+
+    def begin(self, name: str) -> None:
+        self.stats[name].in_flight += 1
+
+    def end(self, name: str, latency_ms: float, cost: Optional[float]) -> None:
+        stats = self.stats[name]
+        stats.in_flight -= 1
+        stats.observe(latency_ms, cost, self.config.ewma_alpha)
+
+
+# =============================================================================
+# Semantic Cache
+# =============================================================================
+
+
+def embed_text(text: str, dim: int = 512) -> "np.ndarray":
+    """
+    Local embedding: hashed character trigrams + words, L2-normalized.
+
+    No model, no network call - good enough to catch typos, reordered
+    words and changed punctuation. It measures spelling, not meaning:
+    "Austria" and "Australia" share most of their trigrams, while
+    "news on" and "news about" share few. Paraphrase-level recall needs a
+    real embedding model; key_terms() guards against the worst false hits
+    either way. crc32 (not hash()) keeps vectors stable across processes,
+    which persistence depends on.
+    """
+    normalized = " ".join(text.lower().split())
+    padded = f" {normalized} "
+    grams = [padded[i:i + 3] for i in range(len(padded) - 2)] + normalized.split()
+
+    buckets = np.fromiter(
+        (zlib.crc32(gram.encode()) % dim for gram in grams),
+        dtype=np.int64,
+        count=len(grams),
+    )
+    vector = np.bincount(buckets, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+_TERM_SENTENCE = re.compile(r"[.!?\n]+")
+_TERM_TOKEN = re.compile(r"\w+")
+
+
+def key_terms(text: str) -> list[str]:
+    """
+    Tokens that must match exactly for two requests to share an answer.
+
+    Similarity can't tell "revenue 2023" from "revenue 2024", or "EU" from
+    "US" - one character apart, opposite answers. So numbers, acronyms and
+    capitalized names (except a sentence's first word, capitalized anyway)
+    are compared as a set, not as part of the vector.
+    """
+    terms = set()
+    for sentence in _TERM_SENTENCE.split(text):
+        for i, token in enumerate(_TERM_TOKEN.findall(sentence)):
+            if (
+                any(c.isdigit() for c in token)
+                or (len(token) > 1 and token.isupper())
+                or (i > 0 and token[0].isupper())
+            ):
+                terms.add(token)
+    return sorted(terms)
+
+
+@contextlib.contextmanager
+def _replaced(path: str, mode: str):
+    """Open a temp file next to `path`; on success, atomically replace `path` with it."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, mode) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+
+
+class VectorIndex:
+    """
+    Fixed-capacity cosine-similarity index with LRU eviction.
+
+    Vectors live in one preallocated float32 matrix, so a lookup is a single
+    matrix-vector product. Vectors are unit length, so dot product = cosine.
+    """
+
+    def __init__(self, capacity: int, dim: int):
+        self.capacity = capacity
+        self.dim = dim
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.entries: list[Optional[dict]] = [None] * capacity
+        self.size = 0
+        self._tick = 0
+
+    SEARCH_CANDIDATES = 8  # Nearest entries offered to `accept`
+
+    def search(
+        self, vector: "np.ndarray", accept: Optional[Callable[[dict], bool]] = None
+    ) -> tuple[Optional[int], float]:
+        """Return (slot, similarity) of the nearest entry (that `accept` takes)."""
+        if self.size == 0:
+            return None, 0.0
+        similarities = self.vectors[:self.size] @ vector
+        if accept is None:
+            slot = int(np.argmax(similarities))
+            return slot, float(similarities[slot])
+
+        k = min(self.SEARCH_CANDIDATES, self.size)
+        nearest = np.argpartition(-similarities, k - 1)[:k]
+        for slot in nearest[np.argsort(-similarities[nearest])]:
+            if accept(self.entries[slot]):
+                return int(slot), float(similarities[slot])
+        return None, 0.0
+
+    def touch(self, slot: int) -> None:
+        self._tick += 1
+        self.last_used[slot] = self._tick
+
+    def add(self, vector: "np.ndarray", entry: dict) -> int:
+        if self.size < self.capacity:
+            slot = self.size
+            self.size += 1
+        else:
+            slot = int(np.argmin(self.last_used[:self.size]))  # Least recently used
+
+        self.vectors[slot] = vector
+        self.entries[slot] = entry
+        self.touch(slot)
+        return slot
+
+    def save(self, path: str) -> None:
+        """
+        Write vectors and entries beside `path`, each via a temp file.
+
+        The .npy may be the very file this index (or another) has mapped
+        from load() - writing it in place would truncate the mapping's
+        backing file. os.replace swaps in a new file instead; existing
+        mappings keep the old one until they are dropped.
+        """
+        with _replaced(f"{path}.npy", "wb") as f:
+            np.save(f, self.vectors)
+        with _replaced(f"{path}.json", "w") as f:
+            json.dump(
+                {
+                    "size": self.size,
+                    "tick": self._tick,
+                    "last_used": self.last_used[:self.size].tolist(),
+                    "entries": self.entries[:self.size],
+                },
+                f,
+                default=str,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        """
+        Map the vector matrix instead of reading it.
+
+        mmap_mode="c" is copy-on-write: startup is instant regardless of index
+        size, pages load on first lookup, and new inserts stay in memory
+        until the next save().
+        """
+        vectors = np.load(f"{path}.npy", mmap_mode="c")
+        with open(f"{path}.json") as f:
+            meta = json.load(f)
+
+        index = cls.__new__(cls)
+        index.capacity, index.dim = vectors.shape
+        index.vectors = vectors
+        index.size = meta["size"]
+        index._tick = meta["tick"]
+        index.last_used = np.zeros(index.capacity, dtype=np.int64)
+        index.last_used[:index.size] = meta["last_used"]
+        index.entries = meta["entries"] + [None] * (index.capacity - index.size)
+        return index
+
+
+@dataclass
+class CacheHit:
+    output: dict
+    cost: float  # What the original call cost - now avoided
+    tokens_used: int
+    similarity: float
+
+
+class SemanticCache:
+    """
+    Similarity-based cache for agent actions.
+
+    A request whose inputs are close enough to a previous one (cosine
+    similarity >= the action's threshold) reuses that output and skips
+    the agent call entirely.
+
+    Design choices:
+        - Opt-in per action: only actions in `thresholds` are cached. Only
+          list actions without side effects - a hit skips the agent, and
+          anything it would have written (state, external calls) with it.
+        - Keyed on the input values, not their JSON: braces and key names
+          shared by every request would inflate every similarity.
+        - Exact terms: numbers, acronyms and names (key_terms) must match
+          too. The default embed_text is lexical, so keep thresholds high
+          (0.95+) with it; pass `embed` for a real embedding model.
+        - Tenant isolation: one index per (tenant, action); a tenant can
+          never be served another tenant's output.
+        - Bounded: each index holds `capacity` entries, LRU-evicted.
+
+    Usage:
+        cache = SemanticCache(thresholds={"summarize": 0.95})
+        orchestrator = Orchestrator(agents, state_store, config, semantic_cache=cache)
+    """
+
+    def __init__(
+        self,
+        thresholds: dict[str, float],
+        capacity_per_index: int = 10_000,
+        dim: int = 512,
+        embed: Optional[Callable[[str, int], "np.ndarray"]] = None,
+    ):
+        if np is None:
+            raise ImportError("SemanticCache requires numpy (pip install numpy)")
+
+        self.thresholds = thresholds
+        self.capacity_per_index = capacity_per_index
+        self.dim = dim
+        self.embed = embed or embed_text
+        self.indexes: dict[tuple[str, str], VectorIndex] = {}
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.cost_avoided = 0.0
+
+    def _key_text(self, inputs: dict) -> str:
+        return "\n".join(str(inputs[name]) for name in sorted(inputs))
+
+    def lookup(self, tenant_id: str, action: str, inputs: dict) -> Optional[CacheHit]:
+        threshold = self.thresholds.get(action)
+        if threshold is None:
+            return None
+
+        index = self.indexes.get((tenant_id, action))
+        if index is None:
+            self.misses += 1
+            return None
+
+        text = self._key_text(inputs)
+        terms = key_terms(text)
+        slot, similarity = index.search(
+            self.embed(text, self.dim), lambda entry: entry.get("terms") == terms
+        )
+        if slot is None or similarity < threshold:
+            self.misses += 1
+            return None
+
+        index.touch(slot)
+        entry = index.entries[slot]
+        self.hits += 1
+        self.cost_avoided += entry["cost"]
+        return CacheHit(
+            output=entry["output"],
+            cost=entry["cost"],
+            tokens_used=entry["tokens_used"],
+            similarity=similarity,
+        )
+
+    def store(self, tenant_id: str, action: str, inputs: dict, result: AgentResult) -> None:
+        if action not in self.thresholds:
+            return
+
+        index = self.indexes.get((tenant_id, action))
+        if index is None:
+            index = VectorIndex(self.capacity_per_index, self.dim)
+            self.indexes[(tenant_id, action)] = index
+
+        text = self._key_text(inputs)
+        index.add(
+            self.embed(text, self.dim),
+            {
+                "output": result.output,
+                "cost": result.cost,
+                "tokens_used": result.tokens_used,
+                "terms": key_terms(text),
+            },
+        )
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def save(self, directory: str) -> None:
+        """Persist every index (vectors as .npy for mmap, entries as JSON)."""
+        os.makedirs(directory, exist_ok=True)
+        manifest = []
+        for (tenant_id, action), index in self.indexes.items():
+            # Hash the namespace - tenant ids are not safe file names
+            name = hashlib.sha256(f"{tenant_id}\0{action}".encode()).hexdigest()[:32]
+            index.save(os.path.join(directory, name))
+            manifest.append({"tenant_id": tenant_id, "action": action, "file": name})
+
+        with _replaced(os.path.join(directory, "manifest.json"), "w") as f:
+            json.dump({"dim": self.dim, "indexes": manifest}, f)
+
+    def load(self, directory: str) -> None:
+        """Memory-map previously saved indexes (fast warm start)."""
+        with open(os.path.join(directory, "manifest.json")) as f:
+            manifest = json.load(f)
+
+        if manifest["dim"] != self.dim:
+            raise ValueError(f"Cache dim mismatch: saved {manifest['dim']}, configured {self.dim}")
+
+        for item in manifest["indexes"]:
+            index = VectorIndex.load(os.path.join(directory, item["file"]))
+            self.indexes[(item["tenant_id"], item["action"])] = index
+
+
+# =============================================================================
+# Pre-flight Estimation
+# =============================================================================
+
+
+@dataclass
+class PricingModel:
+    """What one call of an action costs, declared by the agent."""
+
+    model: str
+    input_cost_per_1k: float  # USD per 1K input tokens
+    output_cost_per_1k: float  # USD per 1K output tokens
+    expected_output_tokens: int = 500
+    downgrade_to: Optional["PricingModel"] = None  # Cheaper fallback if over budget
+
+
+@dataclass
+class Estimate:
+    model: str
+    input_tokens: int
+    output_tokens: int
+    cost: float
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+class TokenEstimator:
+    """
+    Fast local token counting - no API call.
+
+    Uses tiktoken when installed, otherwise ~4 characters per token.
+    Exact counts are memoized, so retries, fan-out and templated prompts
+    cost a dict lookup.
+
+    tiktoken downloads each encoding on first use. That happens in a
+    background thread: until it lands (or if it fails - offline, no
+    cache), counts fall back to the character estimate, so a pre-flight
+    check never blocks on the network.
+    """
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, cache_size: int = 4096):
+        self._tokenizers: dict[str, Any] = {}  # model -> encoding, or None if it failed
+        self._loading: set[str] = set()
+        self._lock = threading.Lock()
+        self.load_errors: dict[str, str] = {}
+        self._exact = functools.lru_cache(maxsize=cache_size)(self._count_exact)
+
+    def _tokenizer(self, model: str) -> Any:
+        """The model's encoding if loaded; else None (and start loading it)."""
+        if tiktoken is None:
+            return None
+        tokenizer = self._tokenizers.get(model)
+        if tokenizer is None and model not in self._tokenizers:
+            with self._lock:
+                if model in self._loading or model in self._tokenizers:
+                    return None
+                self._loading.add(model)
+            threading.Thread(target=self._load, args=(model,), name="tiktoken-load", daemon=True).start()
+        return tokenizer
+
+    def _load(self, model: str) -> None:
+        try:
+            try:
+                tokenizer = tiktoken.encoding_for_model(model)
+            except KeyError:
+                tokenizer = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:  # Offline, blocked download, ... - keep estimating
+            tokenizer = None
+            self.load_errors[model] = str(e) or type(e).__name__
+        with self._lock:
+            self._tokenizers[model] = tokenizer
+            self._loading.discard(model)
+
+    def _count_exact(self, model: str, text: str) -> int:
+        return len(self._tokenizers[model].encode(text, disallowed_special=()))
+
+    def count(self, model: str, text: str) -> int:
+        if self._tokenizer(model) is None:
+            return max(1, -(-len(text) // self.CHARS_PER_TOKEN))
+        return self._exact(model, text)
+
+    def estimate(self, pricing: PricingModel, inputs: dict) -> Estimate:
+        input_tokens = self.count(pricing.model, json.dumps(inputs, sort_keys=True, default=str))
+        output_tokens = pricing.expected_output_tokens
+        return Estimate(
+            model=pricing.model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost=(
+                input_tokens / 1000 * pricing.input_cost_per_1k
+                + output_tokens / 1000 * pricing.output_cost_per_1k
+            ),
+        )
+
+    def fit(
+        self, pricing: PricingModel, inputs: dict, context: ExecutionContext
+    ) -> tuple[Optional[PricingModel], Estimate]:
+        """
+        Walk the downgrade chain and return the first model that fits the
+        remaining token and cost budget, or (None, estimate of the cheapest).
+        """
+        candidate: Optional[PricingModel] = pricing
+        while candidate is not None:
+            estimate = self.estimate(candidate, inputs)
+            if (
+                context.tokens_used + estimate.total_tokens <= context.token_budget
+                and estimate.cost <= context.budget_remaining
+            ):
+                return candidate, estimate
+            candidate = candidate.downgrade_to
+        return None, estimate
+
+
 # =============================================================================
 # Supervisor
 # =============================================================================
@@ -368,18 +1063,19 @@ class Supervisor:
         """
         # Placeholder: return a simple plan
         # Real implementation calls planning LLM
+        # Steps name an action, not an agent - the router picks the replica
         return [
             Step(
                 id=str(uuid.uuid4()),
-                agent_name="research",
+                agent_name=None,
                 action="search",
                 inputs={"query": task},
             ),
             Step(
                 id=str(uuid.uuid4()),
-                agent_name="synthesis",
+                agent_name=None,
                 action="summarize",
-                inputs={"context": "{{research.output}}"},
+                inputs={"context": "{{search.output}}"},
             ),
         ]
 
@@ -414,7 +1110,15 @@ class OrchestratorConfig:
     circuit_breaker_config: CircuitBreakerConfig = field(
         default_factory=CircuitBreakerConfig
     )
+    routing_config: RoutingConfig = field(default_factory=RoutingConfig)
     enable_checkpointing: bool = True
+    agent_start_timeout_seconds: float = 30.0  # Per-agent warm-up limit
+    # Capabilities that must have a warmed-up agent before is_ready; None =
+    # every capability any agent offers (one optional agent failing to
+    # start then keeps the orchestrator out of rotation)
+    required_capabilities: Optional[tuple[str, ...]] = None
+    record_step_traces: bool = True  # Write step timings to state (replay input)
+    clock: Callable[[], float] = time.time  # Replay swaps in a virtual clock
 
 
 class Orchestrator:
@@ -435,18 +1139,128 @@ class Orchestrator:
         state_store: StateStore,
         config: OrchestratorConfig,
         supervisor: Optional[Supervisor] = None,
+        resources: Optional[SharedResources] = None,
+        semantic_cache: Optional[SemanticCache] = None,
     ):
         self.agents = {agent.name: agent for agent in agents}
         self.state = state_store
         self.config = config
         self.supervisor = supervisor or Supervisor()
+        self.resources = resources or SharedResources()
+        self.semantic_cache = semantic_cache
+        self.token_estimator = TokenEstimator()
+
+        # Lifecycle
+        self.startup_errors: dict[str, str] = {}
+        self.shutdown_errors: dict[str, str] = {}  # Agent or resource name -> error
+        self._disabled_at_start: set[str] = set()
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        self._ready = asyncio.Event()
 
         # Circuit breakers per agent
         self.circuit_breakers: dict[str, CircuitBreaker] = {
-            name: CircuitBreaker(config.circuit_breaker_config)
+            name: CircuitBreaker(config.circuit_breaker_config, clock=config.clock)
             for name in self.agents
         }
 
+        # Capability index + replica scoring
+        self.router = AgentRouter(self.agents, self.circuit_breakers, config.routing_config)
+
+    async def __aenter__(self) -> "Orchestrator":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        """
+        Warm up every agent concurrently.
+
+        An agent whose start() fails or times out is disabled, so the router
+        sends its traffic to other replicas instead of failing requests.
+        A later start() (after stop()) gives it another try.
+        """
+        async with self._start_lock:
+            if self._started:
+                return
+
+            for name in self._disabled_at_start:
+                self.agents[name].enabled = True
+            self._disabled_at_start.clear()
+            self.startup_errors.clear()
+
+            await asyncio.gather(*(self._start_agent(agent) for agent in self.agents.values()))
+            self._started = True
+
+            if self.is_fully_covered:
+                self._ready.set()
+
+    async def _start_agent(self, agent: Agent) -> None:
+        try:
+            await asyncio.wait_for(
+                agent.start(self.resources),
+                timeout=self.config.agent_start_timeout_seconds,
+            )
+            agent.ready = True
+        except Exception as e:
+            if agent.enabled:
+                agent.enabled = False
+                self._disabled_at_start.add(agent.name)
+            self.startup_errors[agent.name] = str(e) or type(e).__name__
+
+    async def stop(self) -> None:
+        """
+        Stop every agent, then close the shared clients they were using.
+
+        Failures are collected in shutdown_errors - one bad teardown must
+        not skip the rest.
+        """
+        async with self._start_lock:  # Never interleaved with start()
+            self._ready.clear()
+            self.shutdown_errors = {}
+            stopping = [agent for agent in self.agents.values() if agent.ready]
+            outcomes = await asyncio.gather(
+                *(agent.stop() for agent in stopping), return_exceptions=True
+            )
+            for agent, outcome in zip(stopping, outcomes):
+                if isinstance(outcome, Exception):
+                    self.shutdown_errors[agent.name] = str(outcome) or type(outcome).__name__
+            for agent in self.agents.values():
+                agent.ready = False
+            self.shutdown_errors.update(await self.resources.close_all())
+            self._started = False
+
+    @property
+    def is_fully_covered(self) -> bool:
+        """Every required capability has at least one warmed-up agent."""
+        required = self.config.required_capabilities
+        if required is None:
+            required = tuple(self.router.index)
+        return all(
+            any(self.agents[name].ready for name in self.router.index.get(capability, []))
+            for capability in required
+        )
+
+    @property
+    def is_ready(self) -> bool:
+        """
+        Readiness signal - wire this to your load balancer's health check.
+
+        Set once start() leaves every required capability covered
+        (OrchestratorConfig.required_capabilities); stays false until the
+        next successful start() otherwise.
+        """
+        return self._ready.is_set()
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
     async def execute(
         self,
         task: str,
@@ -457,7 +1271,12 @@ class Orchestrator:
 
         Returns the final result or error information.
         """
-        start_time = time.time()
+        # Fallback for callers that skip start() - first request pays warm-up
+        if not self._started:
+            await self.start()
+
+        clock = self.config.clock
+        start_time = clock()
 
         # 1. Create or resume plan
         plan = await self._get_or_create_plan(task, context)
@@ -474,7 +1293,7 @@ class Orchestrator:
                 "completed_steps": len(plan.completed_steps),
                 "total_steps": len(plan.steps),
                 "cost": context.cost_spent,
-                "latency_ms": (time.time() - start_time) * 1000,
+                "latency_ms": (clock() - start_time) * 1000,
             }
 
         # 3. Validate result
@@ -487,7 +1306,7 @@ class Orchestrator:
                 "error": f"Validation failed: {error}",
                 "plan_id": plan.id,
                 "cost": context.cost_spent,
-                "latency_ms": (time.time() - start_time) * 1000,
+                "latency_ms": (clock() - start_time) * 1000,
             }
 
         # 4. Collect results
@@ -498,7 +1317,8 @@ class Orchestrator:
             "results": {step.id: step.result for step in plan.steps},
             "cost": context.cost_spent,
             "tokens_used": context.tokens_used,
-            "latency_ms": (time.time() - start_time) * 1000,
+            "cost_avoided": context.cost_avoided,
+            "latency_ms": (clock() - start_time) * 1000,
         }
 
     async def _get_or_create_plan(
@@ -545,7 +1365,11 @@ class Orchestrator:
                 )
 
             step = plan.current_step
-            await self._execute_step(step, plan, context)
+            try:
+                await self._execute_step(step, plan, context)
+            finally:
+                if self.config.record_step_traces:
+                    await self._record_step_trace(step, plan, context)
 
             # Checkpoint after successful step
             if step.status == StepStatus.COMPLETED and self.config.enable_checkpointing:
@@ -553,48 +1377,125 @@ class Orchestrator:
 
             plan.current_step_index += 1
 
+    async def _record_step_trace(
+        self, step: Step, plan: Plan, context: ExecutionContext
+    ) -> None:
+        """Persist step timing/outcome so the execution can be replayed later."""
+        trace = step.to_trace()
+        trace["plan_id"] = plan.id
+        await self.state.set(f"step:{plan.id}:{step.id}", trace, context.trace_id)
+
     async def _execute_step(
         self, step: Step, plan: Plan, context: ExecutionContext
     ) -> None:
         """Execute a single step with retries."""
+        clock = self.config.clock
         step.status = StepStatus.RUNNING
+        step.started_at = clock()
+
+        # Resolve input references ({{step_id.output}})
+        resolved_inputs = self._resolve_inputs(step.inputs, plan)
 
-        agent = self.agents.get(step.agent_name)
-        if agent is None:
+        # Semantic cache: a near-duplicate request skips routing and the agent call
+        if self.semantic_cache is not None:
+            hit = self.semantic_cache.lookup(context.tenant_id, step.action, resolved_inputs)
+            if hit is not None:
+                step.status = StepStatus.COMPLETED
+                step.result = hit.output
+                step.cache_hit = True
+                step.cost_avoided = hit.cost
+                step.latency_ms = (clock() - step.started_at) * 1000
+                context.cost_avoided += hit.cost
+                return
+
+        candidates = self.router.candidates(step)
+        if not candidates:
             step.status = StepStatus.FAILED
-            step.error = f"Agent not found: {step.agent_name}"
+            if step.agent_name is not None:
+                step.error = f"Agent not found: {step.agent_name}"
+            else:
+                step.error = f"No agent offers action: {step.action}"
             raise RuntimeError(step.error)
 
-        # Circuit breaker check
-        circuit_breaker = self.circuit_breakers[step.agent_name]
-        if not circuit_breaker.should_allow():
+        # Pre-flight: predict tokens/cost before paying for the call.
+        # Done before routing, so a rejection never burns a half-open probe.
+        fits: dict[str, tuple[Optional[PricingModel], Optional[PricingModel], Optional[Estimate]]] = {}
+        for name in candidates:
+            pricing = self.agents[name].pricing.get(step.action)
+            if pricing is None:
+                fits[name] = (None, None, None)  # Undeclared - accounted after the call
+                continue
+            model, estimate = self.token_estimator.fit(pricing, resolved_inputs, context)
+            if model is not None:
+                fits[name] = (pricing, model, estimate)
+            else:
+                step.estimated_tokens = estimate.total_tokens
+                step.estimated_cost = estimate.cost
+
+        if not fits:
             step.status = StepStatus.FAILED
-            step.error = f"Circuit breaker open for agent: {step.agent_name}"
+            step.error = (
+                f"Pre-flight budget check failed for {step.action}: "
+                f"needs ~{step.estimated_tokens} tokens / ${step.estimated_cost:.4f}, "
+                f"{context.token_budget - context.tokens_used} tokens / "
+                f"${context.budget_remaining:.4f} left"
+            )
             raise RuntimeError(step.error)
 
-        # Resolve input references ({{step_id.output}})
-        resolved_inputs = self._resolve_inputs(step.inputs, plan)
+        # Route to the best replica (circuit breaker check happens here)
+        agent_name = self.router.select(list(fits))
+        if agent_name is None:
+            step.status = StepStatus.FAILED
+            if step.agent_name is not None:
+                step.error = f"Circuit breaker open for agent: {step.agent_name}"
+            else:
+                step.error = f"Circuit breaker open for every agent offering: {step.action}"
+            raise RuntimeError(step.error)
+
+        agent = self.agents[agent_name]
+        circuit_breaker = self.circuit_breakers[agent_name]
+        step.routed_to = agent_name
+
+        pricing, model, estimate = fits[agent_name]
+        agent_inputs = resolved_inputs
+        if estimate is not None:
+            step.estimated_tokens = estimate.total_tokens
+            step.estimated_cost = estimate.cost
+            if model is not pricing:
+                # Agents read inputs["model"] to pick the cheaper model. The
+                # cache keys on resolved_inputs, as lookups do - a lookup
+                # can't know a downgrade is coming
+                step.downgraded_to = model.model
+                agent_inputs = {**resolved_inputs, "model": model.model}
 
         # Execute with retries
         last_error: Optional[str] = None
         for attempt in range(self.config.max_retries_per_step):
+            start = clock()
+            observed_cost: Optional[float] = None
+            self.router.begin(agent_name)
             try:
-                start = time.time()
                 result = await agent.execute(
                     step.action,
-                    resolved_inputs,
+                    agent_inputs,
                     self.state,
                     context,
                 )
-                step.latency_ms = (time.time() - start) * 1000
+                step.latency_ms = (clock() - start) * 1000
 
                 if result.success:
+                    observed_cost = result.cost
                     step.status = StepStatus.COMPLETED
                     step.result = result.output
                     step.cost = result.cost
+                    step.tokens_used = result.tokens_used
                     context.cost_spent += result.cost
                     context.tokens_used += result.tokens_used
                     circuit_breaker.record_success()
+                    if self.semantic_cache is not None:
+                        self.semantic_cache.store(
+                            context.tenant_id, step.action, resolved_inputs, result
+                        )
                     return
                 else:
                     last_error = result.error
@@ -604,6 +1505,12 @@ class Orchestrator:
                 last_error = str(e)
                 step.retries += 1
 
+            finally:
+                # Failures count toward latency too - slow errors should lose traffic
+                attempt_ms = (clock() - start) * 1000
+                step.attempt_latencies_ms.append(attempt_ms)
+                self.router.end(agent_name, attempt_ms, observed_cost)
+
             # Wait before retry
             if attempt < self.config.max_retries_per_step - 1:
                 await asyncio.sleep(self.config.retry_delay_seconds)
@@ -617,15 +1524,21 @@ class Orchestrator:
     def _resolve_inputs(self, inputs: dict, plan: Plan) -> dict:
         """
         Resolve references like {{step_id.output}} to actual values.
+
+        A completed step can be referenced by its id, its action, or the
+        agent that ran it.
         """
         resolved = {}
         for key, value in inputs.items():
             if isinstance(value, str) and "{{" in value:
                 # Simple template resolution
                 for step in plan.completed_steps:
-                    placeholder = f"{{{{{step.agent_name}.output}}}}"
-                    if placeholder in value and step.result:
-                        value = str(step.result)
+                    refs = {step.id, step.action, step.agent_name, step.routed_to}
+                    for ref in refs - {None}:
+                        placeholder = f"{{{{{ref}.output}}}}"
+                        if placeholder in value and step.result:
+                            value = str(step.result)
+                            break
             resolved[key] = value
         return resolved
 
@@ -638,9 +1551,9 @@ class Orchestrator:
 class ResearchAgent(Agent):
     """Example agent that performs research."""
 
-    def __init__(self):
+    def __init__(self, name: str = "research"):
         super().__init__(
-            name="research",
+            name=name,
             description="Searches for information and retrieves relevant context",
         )
 
@@ -648,6 +1561,11 @@ class ResearchAgent(Agent):
     def capabilities(self) -> list[str]:
         return ["search", "retrieve", "fact_check"]
 
+    async def start(self, resources: SharedResources) -> None:
+        # In production: self.client = await resources.get("search_api")
+        # and load the retrieval index, so the first search isn't a cold one
+        await asyncio.sleep(0.05)  # Simulate warm-up
+
     async def execute(
         self,
         action: str,
@@ -691,6 +1609,22 @@ class ResearchAgent(Agent):
 class SynthesisAgent(Agent):
     """Example agent that synthesizes information."""
 
+    # Falls back to the mini model when the full one would blow the budget
+    PRICING = {
+        "summarize": PricingModel(
+            model="gpt-4o",
+            input_cost_per_1k=0.0025,
+            output_cost_per_1k=0.01,
+            expected_output_tokens=500,
+            downgrade_to=PricingModel(
+                model="gpt-4o-mini",
+                input_cost_per_1k=0.00015,
+                output_cost_per_1k=0.0006,
+                expected_output_tokens=500,
+            ),
+        ),
+    }
+
     def __init__(self):
         super().__init__(
             name="synthesis",
@@ -701,6 +1635,15 @@ class SynthesisAgent(Agent):
     def capabilities(self) -> list[str]:
         return ["summarize", "analyze", "format"]
 
+    @property
+    def pricing(self) -> dict[str, PricingModel]:
+        return self.PRICING
+
+    async def start(self, resources: SharedResources) -> None:
+        # In production: self.llm = await resources.get("llm_client")
+        # Replicas share one pooled client instead of opening their own
+        await asyncio.sleep(0.05)  # Simulate warm-up
+
     async def execute(
         self,
         action: str,
@@ -718,6 +1661,7 @@ class SynthesisAgent(Agent):
                 "summary": "This is a synthesized summary based on the research.",
                 "key_points": ["Point 1", "Point 2", "Point 3"],
                 "confidence": 0.85,
+                "model": inputs.get("model", "gpt-4o"),  # Set if pre-flight downgraded
             }
 
             return AgentResult(
@@ -753,11 +1697,17 @@ class ExecutionMetrics:
     steps_completed: int
     steps_failed: int
     steps_retried: int
+    cache_hits: int = 0
+    cost_avoided: float = 0.0
 
     # Per-agent breakdown
     agent_latencies: dict[str, float] = field(default_factory=dict)
     agent_costs: dict[str, float] = field(default_factory=dict)
 
+    # Per-step timeline (Step.to_trace records) - enough to replay the run
+    start_time: float = 0.0
+    steps: list[dict] = field(default_factory=list)
+
     @classmethod
     def from_plan(cls, plan: Plan, context: ExecutionContext) -> "ExecutionMetrics":
         agent_latencies = {}
@@ -765,12 +1715,16 @@ class ExecutionMetrics:
         steps_retried = 0
 
         for step in plan.steps:
-            if step.agent_name not in agent_latencies:
-                agent_latencies[step.agent_name] = 0
-                agent_costs[step.agent_name] = 0
+            agent_name = step.routed_to or step.agent_name
+            if agent_name is None:
+                continue  # Never routed (cache hit, or plan stopped first)
+
+            if agent_name not in agent_latencies:
+                agent_latencies[agent_name] = 0
+                agent_costs[agent_name] = 0
 
-            agent_latencies[step.agent_name] += step.latency_ms
-            agent_costs[step.agent_name] += step.cost
+            agent_latencies[agent_name] += step.latency_ms
+            agent_costs[agent_name] += step.cost
 
             if step.retries > 0:
                 steps_retried += 1
@@ -785,11 +1739,391 @@ class ExecutionMetrics:
             steps_completed=len([s for s in plan.steps if s.status == StepStatus.COMPLETED]),
             steps_failed=len([s for s in plan.steps if s.status == StepStatus.FAILED]),
             steps_retried=steps_retried,
+            cache_hits=len([s for s in plan.steps if s.cache_hit]),
+            cost_avoided=context.cost_avoided,
             agent_latencies=agent_latencies,
             agent_costs=agent_costs,
+            start_time=context.start_time,
+            steps=[step.to_trace() for step in plan.steps if step.started_at is not None],
         )
 
 
+# =============================================================================
+# Trace Replay
+# =============================================================================
+
+
+@dataclass
+class RecordedStep:
+    """One step as it happened in production."""
+
+    action: str
+    agent_name: Optional[str]
+    latency_ms: float  # Final attempt
+    success: bool
+    cost: float = 0.0
+    tokens_used: int = 0
+    retries: int = 0  # Failed attempts before the final outcome
+    error: Optional[str] = None
+    attempt_latencies_ms: list[float] = field(default_factory=list)  # Empty in older traces
+
+    def attempt_latency_ms(self, attempt: int) -> float:
+        """Recorded latency of the given attempt; the last one for attempts past the record."""
+        if not self.attempt_latencies_ms:
+            return self.latency_ms
+        return self.attempt_latencies_ms[min(attempt, len(self.attempt_latencies_ms) - 1)]
+
+    @classmethod
+    def from_trace(cls, trace: dict) -> "RecordedStep":
+        return cls(
+            action=trace["action"],
+            agent_name=trace.get("agent_name"),
+            latency_ms=trace.get("latency_ms", 0.0),
+            attempt_latencies_ms=list(trace.get("attempt_latencies_ms", [])),
+            success=trace.get("status") == StepStatus.COMPLETED.value,
+            cost=trace.get("cost", 0.0),
+            tokens_used=trace.get("tokens_used", 0),
+            retries=trace.get("retries", 0),
+            error=trace.get("error"),
+        )
+
+
+@dataclass
+class RecordedExecution:
+    """One recorded orchestrator execution, positioned on the replay timeline."""
+
+    trace_id: str
+    start_offset: float  # Seconds after the first recorded execution started
+    steps: list[RecordedStep]
+
+
+def load_traces_from_history(history: list[dict]) -> list[RecordedExecution]:
+    """Rebuild executions from the step traces in InMemoryStateStore.history."""
+    by_plan: dict[str, list[dict]] = {}
+    trace_ids: dict[str, str] = {}
+    for entry in history:
+        if not entry["key"].startswith("step:"):
+            continue
+        trace = entry["value"]
+        if trace.get("started_at") is None:
+            continue
+        by_plan.setdefault(trace["plan_id"], []).append(trace)
+        trace_ids[trace["plan_id"]] = entry["trace_id"]
+
+    return _to_executions(
+        [(trace_ids[plan_id], step_traces) for plan_id, step_traces in by_plan.items()]
+    )
+
+
+def load_traces_from_metrics(metrics: list[ExecutionMetrics]) -> list[RecordedExecution]:
+    """Rebuild executions from exported ExecutionMetrics."""
+    return _to_executions([(m.trace_id, m.steps) for m in metrics if m.steps])
+
+
+def _to_executions(runs: list[tuple[str, list[dict]]]) -> list[RecordedExecution]:
+    if not runs:
+        return []
+
+    starts = [min(t["started_at"] for t in step_traces) for _, step_traces in runs]
+    origin = min(starts)
+
+    executions = [
+        RecordedExecution(
+            trace_id=trace_id,
+            start_offset=start - origin,
+            steps=[
+                RecordedStep.from_trace(t)
+                for t in sorted(step_traces, key=lambda t: t["started_at"])
+            ],
+        )
+        for (trace_id, step_traces), start in zip(runs, starts)
+    ]
+    executions.sort(key=lambda e: e.start_offset)
+    return executions
+
+
+class _VirtualTimeSelector(selectors.BaseSelector):
+    """
+    Selector that never sleeps.
+
+    When the loop would block waiting for its next timer, we jump the
+    virtual clock straight to that timer instead.
+    """
+
+    def __init__(self, loop: "VirtualClockLoop"):
+        self._loop = loop
+        self._selector = selectors.DefaultSelector()
+
+    def register(self, fileobj, events, data=None):
+        return self._selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj):
+        return self._selector.unregister(fileobj)
+
+    def modify(self, fileobj, events, data=None):
+        return self._selector.modify(fileobj, events, data)
+
+    def get_map(self):
+        return self._selector.get_map()
+
+    def close(self) -> None:
+        self._selector.close()
+
+    def select(self, timeout=None):
+        if timeout is None:
+            # No timers pending - only real I/O can wake us, same as a normal loop
+            return self._selector.select(None)
+
+        events = self._selector.select(0)
+        if not events and timeout > 0:
+            self._loop._virtual_now += timeout
+        return events
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop whose clock only moves when every task is waiting on a timer.
+
+    asyncio.sleep(3600) completes instantly, but ordering and timeouts
+    behave exactly as they would in real time.
+    """
+
+    def __init__(self):
+        self._virtual_now = 0.0
+        super().__init__(selector=_VirtualTimeSelector(self))
+
+    def time(self) -> float:
+        return self._virtual_now
+
+
+class ReplayAgent(Agent):
+    """
+    Stand-in agent that reproduces recorded timings, failures and costs.
+
+    Each attempt sleeps for that attempt's recorded latency (virtual time).
+    A step that needed N retries in production fails its first N attempts
+    here too. Attempt counts are kept per replayed execution and step
+    index, and dropped with forget() once the execution finishes.
+    """
+
+    def __init__(self, name: str, actions: set[str], latency_scale: float = 1.0):
+        super().__init__(name=name, description=f"Replay of {name}")
+        self.actions = actions
+        self.latency_scale = latency_scale
+        self._attempts: dict[str, dict[int, int]] = {}  # replay_id -> step index -> attempts
+
+    def forget(self, replay_id: str) -> None:
+        self._attempts.pop(replay_id, None)
+
+    @property
+    def capabilities(self) -> list[str]:
+        return sorted(self.actions)
+
+    async def execute(
+        self,
+        action: str,
+        inputs: dict,
+        state: StateStore,
+        context: ExecutionContext,
+    ) -> AgentResult:
+        recorded: RecordedStep = inputs["replay_step"]
+        replay_id, index = inputs["replay_key"]
+        attempts = self._attempts.setdefault(replay_id, {})
+        attempt = attempts.get(index, 0)
+        attempts[index] = attempt + 1
+
+        latency_ms = recorded.attempt_latency_ms(attempt) * self.latency_scale
+        await asyncio.sleep(latency_ms / 1000)
+
+        if not recorded.success or attempt < recorded.retries:
+            return AgentResult(
+                success=False,
+                output={},
+                latency_ms=latency_ms,
+                error=recorded.error or "Replayed failure",
+            )
+
+        return AgentResult(
+            success=True,
+            output={"replayed": f"{replay_id}:{index}"},
+            cost=recorded.cost,
+            tokens_used=recorded.tokens_used,
+            latency_ms=latency_ms,
+        )
+
+
+class ReplaySupervisor(Supervisor):
+    """
+    Returns the recorded plan for each execution instead of planning anew.
+
+    The task is a replay id (see replay_id()), not the trace id: a workload
+    may hold the same trace id twice, and each copy must replay on its own.
+    """
+
+    def __init__(self, executions: list[RecordedExecution], pin_agents: bool):
+        super().__init__()
+        self.executions = {self.replay_id(i, e): e for i, e in enumerate(executions)}
+        self.pin_agents = pin_agents
+
+    @staticmethod
+    def replay_id(position: int, execution: RecordedExecution) -> str:
+        return f"{execution.trace_id}#{position}"
+
+    async def _decompose_task(
+        self, task: str, agent_capabilities: dict
+    ) -> list[Step]:
+        execution = self.executions[task]
+        steps = []
+        for i, recorded in enumerate(execution.steps):
+            steps.append(
+                Step(
+                    id=f"{task}:{i}",
+                    agent_name=recorded.agent_name if self.pin_agents else None,
+                    action=recorded.action,
+                    inputs={"replay_step": recorded, "replay_key": (task, i)},
+                )
+            )
+        return steps
+
+
+@dataclass
+class ReplayReport:
+    """Outcome of replaying a workload."""
+
+    executions: int
+    succeeded: int
+    failed: int
+    total_cost: float
+    virtual_seconds: float
+    wall_seconds: float
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def speedup(self) -> float:
+        return self.virtual_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+class TraceReplayer:
+    """
+    Replays recorded executions through the real Orchestrator.
+
+    Runs on a virtual clock: arrival gaps, step latencies, retry delays,
+    timeouts and circuit-breaker reset windows all elapse instantly, so
+    hours of traffic replay in seconds - and the same input always gives
+    the same result.
+
+    What-if knobs:
+        config: try different retry/breaker/routing settings
+        pin_agents=False: let the router re-route instead of repeating history
+        latency_scale: e.g. {"research": 3.0} to simulate a slow provider
+
+    Usage:
+        executions = load_traces_from_history(state_store.history)
+        report = TraceReplayer(executions, OrchestratorConfig(max_retries_per_step=2)).run()
+        print(report.succeeded, report.percentile(0.99))
+    """
+
+    def __init__(
+        self,
+        executions: list[RecordedExecution],
+        config: OrchestratorConfig,
+        pin_agents: bool = True,
+        latency_scale: Optional[dict[str, float]] = None,
+        context_kwargs: Optional[dict] = None,
+    ):
+        self.executions = executions
+        self.config = config
+        self.pin_agents = pin_agents
+        self.latency_scale = latency_scale or {}
+        self.context_kwargs = context_kwargs or {}
+
+    def run(self) -> ReplayReport:
+        """Replay the workload. Blocking - call from sync code, not from a running loop."""
+        loop = VirtualClockLoop()
+        try:
+            return loop.run_until_complete(self._replay(loop))
+        finally:
+            loop.close()
+
+    def _build_agents(self) -> list[Agent]:
+        actions_by_agent: dict[str, set[str]] = {}
+        for execution in self.executions:
+            for recorded in execution.steps:
+                name = recorded.agent_name or f"replay:{recorded.action}"
+                actions_by_agent.setdefault(name, set()).add(recorded.action)
+
+        return [
+            ReplayAgent(name, actions, self.latency_scale.get(name, 1.0))
+            for name, actions in actions_by_agent.items()
+        ]
+
+    async def _replay(self, loop: VirtualClockLoop) -> ReplayReport:
+        wall_start = time.perf_counter()
+        config = replace(self.config, clock=loop.time)
+        orchestrator = Orchestrator(
+            self._build_agents(),
+            InMemoryStateStore(),
+            config,
+            supervisor=ReplaySupervisor(self.executions, self.pin_agents),
+        )
+
+        await orchestrator.start()
+        origin = loop.time()
+        results = await asyncio.gather(
+            *(
+                self._run_one(orchestrator, ReplaySupervisor.replay_id(i, execution), execution, loop, origin)
+                for i, execution in enumerate(self.executions)
+            )
+        )
+        virtual_seconds = loop.time() - origin
+        await orchestrator.stop()
+
+        report = ReplayReport(
+            executions=len(results),
+            succeeded=sum(1 for r in results if r["success"]),
+            failed=sum(1 for r in results if not r["success"]),
+            total_cost=sum(r["cost"] for r in results),
+            virtual_seconds=virtual_seconds,
+            wall_seconds=time.perf_counter() - wall_start,
+            latencies_ms=[r["latency_ms"] for r in results],
+        )
+        for r in results:
+            if not r["success"]:
+                report.errors[r["error"]] = report.errors.get(r["error"], 0) + 1
+        return report
+
+    async def _run_one(
+        self,
+        orchestrator: Orchestrator,
+        replay_id: str,
+        execution: RecordedExecution,
+        loop: VirtualClockLoop,
+        origin: float,
+    ) -> dict:
+        await asyncio.sleep(max(0.0, origin + execution.start_offset - loop.time()))
+        context = ExecutionContext(
+            trace_id=execution.trace_id,
+            tenant_id="replay",
+            user_id="replay",
+            session_id="replay",
+            clock=loop.time,
+            **self.context_kwargs,
+        )
+        try:
+            return await orchestrator.execute(replay_id, context)
+        finally:
+            for agent in orchestrator.agents.values():
+                if isinstance(agent, ReplayAgent):
+                    agent.forget(replay_id)
+
+
 # =============================================================================
 # Usage Example
 # =============================================================================
@@ -798,9 +2132,10 @@ class ExecutionMetrics:
 async def main():
     """Example usage of the orchestrator."""
 
-    # Set up agents
+    # Set up agents (two research replicas share the "search" capability)
     agents = [
         ResearchAgent(),
+        ResearchAgent(name="research-replica"),
         SynthesisAgent(),
     ]
 
@@ -814,8 +2149,17 @@ async def main():
         enable_checkpointing=True,
     )
 
-    # Create orchestrator
-    orchestrator = Orchestrator(agents, state_store, config)
+    # Semantic cache for near-duplicate requests (skipped if NumPy is missing).
+    # Not "search": ResearchAgent writes its results to state, which a hit would skip
+    semantic_cache = (
+        SemanticCache(thresholds={"summarize": 0.95})
+        if np is not None
+        else None
+    )
+
+    # Create orchestrator and warm up all agents before taking traffic
+    orchestrator = Orchestrator(agents, state_store, config, semantic_cache=semantic_cache)
+    await orchestrator.start()
 
     # Create execution context
     context = ExecutionContext(
@@ -831,6 +2175,7 @@ async def main():
     print("=" * 60)
     print("Orchestrator Execution")
     print("=" * 60)
+    print(f"Ready: {orchestrator.is_ready}")
 
     task = "Research the latest developments in AI safety and summarize the key findings"
 
@@ -845,6 +2190,45 @@ async def main():
         for step_id, step_result in result["results"].items():
             print(f"  {step_id}: {step_result}")
 
+    print(f"\nRouting:")
+    for name, stats in orchestrator.router.stats.items():
+        print(f"  {name}: calls={stats.calls} ewma_latency_ms={stats.ewma_latency_ms}")
+
+    if semantic_cache is not None:
+        # Same question, different wording - served from cache
+        repeat_context = ExecutionContext(
+            trace_id=str(uuid.uuid4()),
+            tenant_id="tenant_123",
+            user_id="user_789",
+            session_id="session_790",
+            cost_budget=1.0,
+            timeout_seconds=30.0,
+        )
+        repeat = await orchestrator.execute(
+            "Research the latest developments in AI safety and summarise the key findings.",
+            repeat_context,
+        )
+        print(f"\nNear-duplicate request:")
+        print(f"  Cost: ${repeat['cost']:.4f} (avoided ${repeat['cost_avoided']:.4f})")
+        print(f"  Latency: {repeat['latency_ms']:.2f}ms")
+        print(f"  Cache hit rate: {semantic_cache.hit_rate:.0%}")
+
+        # Warm start from disk, keep caching, save over the mapped files, reload
+        with tempfile.TemporaryDirectory() as directory:
+            semantic_cache.save(directory)
+            warm = SemanticCache(thresholds=semantic_cache.thresholds)
+            warm.load(directory)
+            extra = {"context": "Quarterly revenue for Acme in 2023"}
+            warm.store("tenant_123", "summarize", extra, AgentResult(success=True, output={"summary": "..."}))
+            warm.save(directory)
+            reloaded = SemanticCache(thresholds=semantic_cache.thresholds)
+            reloaded.load(directory)
+            entries = sum(index.size for index in reloaded.indexes.values())
+            found = reloaded.lookup("tenant_123", "summarize", extra) is not None
+        print(f"  Persistence round trip: {entries} entries reloaded, new entry found: {found}")
+
+    await orchestrator.stop()
+
 
 if __name__ == "__main__":
     asyncio.run(main())